@@ -10,6 +10,11 @@ Read more about hooks here: https://docs.anthropic.com/en/docs/claude-code/hooks
 
 Make sure to change your path to your actual script.
 
+The validator can also be imported and reused: `validate_command` checks one
+command and `validate_many` checks a batch (e.g. when replaying shell
+history). Running the script with --server keeps one warm process that
+answers one hook input per line; see `serve`.
+
 {
   "hooks": {
     "PreToolUse": [
@@ -28,55 +33,279 @@ Make sure to change your path to your actual script.
 
 """
 
+import argparse
 import json
+import os
 import re
+import shlex
 import sys
 
-# Define validation rules as a list of (regex pattern, message) tuples
+# Define validation rules as a list of
+# (program, argument check, message, allowed in a pipeline) tuples.
+# A rule only runs against simple commands whose argv[0] is `program`; the
+# check is called with the command's arguments (argv[1:]) after shell
+# unquoting, so a quoted path with spaces is still one argument (None
+# matches any).
 _VALIDATION_RULES = [
     (
-        r"^grep\b(?!.*\|)",
+        "grep",
+        None,
         "Use 'rg' (ripgrep) instead of 'grep' for better performance and features",
+        True,
     ),
     (
-        r"^find\s+\S+\s+-name\b",
+        "find",
+        lambda args: "-name" in args[1:],
         "Use 'rg --files | rg pattern' or 'rg --files -g pattern' instead of 'find -name' for better performance",
+        False,
     ),
 ]
 
+# Rules grouped by the program they apply to
+_RULES_BY_PROGRAM: dict[str, list[tuple]] = {}
+for _program, _check, _message, _allow_in_pipeline in _VALIDATION_RULES:
+    _RULES_BY_PROGRAM.setdefault(_program, []).append(
+        (_check, _message, _allow_in_pipeline)
+    )
+
+# Unquoted characters that end a simple command: lists (; & && || newline),
+# pipelines (| |&), subshells and command substitutions (( ) `)
+_SEPARATOR_CHARS = ";&|\n()`"
+_PIPE_OPERATORS = ("|", "|&")
+_ASSIGNMENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*=")
+# Heredoc operator (<< or <<-) and its delimiter word, possibly quoted
+_HEREDOC_RE = re.compile(r"<<(-?)[ \t]*((?:'[^']*'|\"[^\"]*\"|[^\s;&|()<>`])+)")
+
+
+def _heredoc_end(command: str, start: int, heredocs: list[tuple[str, bool]]) -> int:
+    """Return the offset just past the heredoc bodies that begin at start.
+
+    heredocs holds (delimiter, strip_tabs) in the order the operators
+    appeared; each body runs up to a line equal to its delimiter.
+    """
+    i = start
+    for delimiter, strip_tabs in heredocs:
+        while i < len(command):
+            end = command.find("\n", i)
+            end = len(command) if end == -1 else end
+            line = command[i:end]
+            i = end + 1
+            if (line.lstrip("\t") if strip_tabs else line) == delimiter:
+                break
+    return min(i, len(command))
+
+
+def _is_redirection(command: str, i: int) -> bool:
+    """Check whether the separator character at i is part of a redirection."""
+    prev_char = command[i - 1] if i > 0 else ""
+    next_char = command[i + 1] if i + 1 < len(command) else ""
+    if command[i] == "&":
+        # 2>&1, <&3, &>file
+        return prev_char in "<>" or next_char == ">"
+    if command[i] == "|":
+        # >| file (clobber)
+        return prev_char == ">"
+    return False
+
+
+def _split_segments(command: str) -> list[tuple[list[str], bool]]:
+    """Split a shell command into its simple commands.
+
+    Returns (argv, piped) for each simple command, where piped is True if
+    it reads from or writes to a pipe. Separators inside quotes are
+    ignored, and comments and heredoc bodies are dropped. Leading variable
+    assignments are removed from argv.
+    """
+    texts = []
+    operators = [""]  # operators[k] precedes texts[k]
+    current = []
+    quote = None
+    heredocs = []  # Delimiters whose bodies start after the next newline
+    i = 0
+    n = len(command)
+    while i < n:
+        c = command[i]
+        if quote == "'":
+            quote = None if c == "'" else quote
+            current.append(c)
+            i += 1
+        elif quote == '"':
+            if c == "\\":
+                current.append(command[i : i + 2])
+                i += 2
+                continue
+            quote = None if c == '"' else quote
+            current.append(c)
+            i += 1
+        elif c == "\\":
+            # Line continuations join lines; other escapes are kept for shlex
+            current.append(" " if command[i + 1 : i + 2] == "\n" else command[i : i + 2])
+            i += 2
+        elif c in "'\"":
+            quote = c
+            current.append(c)
+            i += 1
+        elif c == "#" and (not current or current[-1].isspace()):
+            end = command.find("\n", i)
+            i = n if end == -1 else end
+        elif command.startswith("<<<", i):
+            # Here-string: its word is an argument, not a delimiter
+            current.append("<<<")
+            i += 3
+        elif command.startswith("<<", i) and (heredoc := _HEREDOC_RE.match(command, i)):
+            # Keep the operator for shlex; the body is skipped at the next newline
+            delimiter = re.sub(r"""['"\\]""", "", heredoc.group(2))
+            heredocs.append((delimiter, heredoc.group(1) == "-"))
+            current.append(heredoc.group(0))
+            i = heredoc.end()
+        elif c in _SEPARATOR_CHARS and not _is_redirection(command, i):
+            end = i + 1
+            while (
+                end < n
+                and command[end] in _SEPARATOR_CHARS
+                and not _is_redirection(command, end)
+                and not (heredocs and command[end - 1] == "\n")
+            ):
+                end += 1
+            texts.append("".join(current))
+            operators.append(command[i:end])
+            current = []
+            i = end
+            if heredocs and command[end - 1] == "\n":
+                i = _heredoc_end(command, end, heredocs)
+                heredocs = []
+        else:
+            current.append(c)
+            i += 1
+    texts.append("".join(current))
+    operators.append("")
 
-def _validate_command(command: str) -> list[str]:
+    segments = []
+    for k, text in enumerate(texts):
+        try:
+            argv = shlex.split(text)
+        except ValueError:
+            argv = text.split()  # Unterminated quote: best effort
+        while argv and _ASSIGNMENT_RE.match(argv[0]):
+            argv.pop(0)
+        if not argv:
+            continue
+        piped = operators[k] in _PIPE_OPERATORS or operators[k + 1] in _PIPE_OPERATORS
+        segments.append((argv, piped))
+    return segments
+
+
+def validate_command(command: str) -> list[str]:
+    """Return the rule messages that apply to a shell command."""
     issues = []
-    for pattern, message in _VALIDATION_RULES:
-        if re.search(pattern, command):
-            issues.append(message)
+    for argv, piped in _split_segments(command):
+        rules = _RULES_BY_PROGRAM.get(os.path.basename(argv[0]))
+        if not rules:
+            continue
+        for check, message, allow_in_pipeline in rules:
+            if piped and allow_in_pipeline:
+                continue
+            if check is None or check(argv[1:]):
+                if message not in issues:
+                    issues.append(message)
     return issues
 
 
-def main():
-    try:
-        input_data = json.load(sys.stdin)
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON input: {e}", file=sys.stderr)
-        # Exit code 1 shows stderr to the user but not to Claude
-        sys.exit(1)
+def validate_many(commands) -> list[tuple[str, list[str]]]:
+    """Validate an iterable of commands, returning (command, issues) pairs
+    for the commands that have issues."""
+    results = []
+    for command in commands:
+        issues = validate_command(command)
+        if issues:
+            results.append((command, issues))
+    return results
 
-    tool_name = input_data.get("tool_name", "")
-    if tool_name != "Bash":
-        sys.exit(0)
+
+def _evaluate(input_data) -> tuple[int, str]:
+    """Evaluate one hook input and return (exit code, stderr text)."""
+    if not isinstance(input_data, dict) or input_data.get("tool_name", "") != "Bash":
+        return 0, ""
 
     tool_input = input_data.get("tool_input", {})
+    if not isinstance(tool_input, dict):
+        # Exit code 1 shows stderr to the user but not to Claude
+        return 1, "Error: Invalid hook input: tool_input must be an object"
     command = tool_input.get("command", "")
+    if not isinstance(command, str):
+        return 1, "Error: Invalid hook input: tool_input.command must be a string"
 
     if not command:
-        sys.exit(0)
+        return 0, ""
 
-    issues = _validate_command(command)
+    issues = validate_command(command)
     if issues:
-        for message in issues:
-            print(f"• {message}", file=sys.stderr)
         # Exit code 2 blocks tool call and shows stderr to Claude
-        sys.exit(2)
+        return 2, "\n".join(f"• {message}" for message in issues)
+    return 0, ""
+
+
+def serve(stdin=sys.stdin, stdout=sys.stdout):
+    """Answer hook inputs in a loop, one JSON object per line.
+
+    Each input line is the JSON a hook would receive on stdin. Each reply
+    is a JSON line {"exit_code": int, "stderr": str} telling the wrapper
+    what the hook would have exited with and printed. A malformed input
+    gets an error reply; the loop keeps serving.
+    """
+    for line in stdin:
+        if not line.strip():
+            continue
+        try:
+            exit_code, stderr = _evaluate(json.loads(line))
+        except json.JSONDecodeError as e:
+            # Exit code 1 shows stderr to the user but not to Claude
+            exit_code, stderr = 1, f"Error: Invalid JSON input: {e}"
+        except Exception as e:
+            exit_code, stderr = 1, f"Error: Failed to validate input: {e}"
+        stdout.write(json.dumps({"exit_code": exit_code, "stderr": stderr}) + "\n")
+        stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate Bash commands")
+    parser.add_argument(
+        "--server",
+        action="store_true",
+        help="Answer one JSON hook input per line on stdin until EOF",
+    )
+    parser.add_argument(
+        "--history",
+        metavar="FILE",
+        help="Validate every line of a shell history file and report issues",
+    )
+    args = parser.parse_args()
+
+    if args.server:
+        serve()
+        return
+
+    if args.history:
+        with open(args.history, errors="replace") as f:
+            commands = (line.rstrip("\n") for line in f if line.strip())
+            results = validate_many(commands)
+        for command, issues in results:
+            print(command)
+            for message in issues:
+                print(f"  • {message}")
+        sys.exit(1 if results else 0)
+
+    try:
+        input_data = json.load(sys.stdin)
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON input: {e}", file=sys.stderr)
+        # Exit code 1 shows stderr to the user but not to Claude
+        sys.exit(1)
+
+    exit_code, stderr = _evaluate(input_data)
+    if stderr:
+        print(stderr, file=sys.stderr)
+    sys.exit(exit_code)
 
 
 if __name__ == "__main__":
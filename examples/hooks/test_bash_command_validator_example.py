@@ -0,0 +1,106 @@
+"""Tests for bash_command_validator_example.py (run with pytest)."""
+
+import io
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import bash_command_validator_example as validator
+
+GREP_MESSAGE = validator._VALIDATION_RULES[0][2]
+FIND_MESSAGE = validator._VALIDATION_RULES[1][2]
+
+
+def programs(command):
+    return [(argv[0], piped) for argv, piped in validator._split_segments(command)]
+
+
+def test_compound_commands_are_split_into_simple_commands():
+    assert programs("cd x && grep foo") == [("cd", False), ("grep", False)]
+    assert programs("a | b; c") == [("a", True), ("b", True), ("c", False)]
+    assert programs("(cd x || exit 1) & echo $(grep y f)") == [
+        ("cd", False), ("exit", False), ("echo", False), ("grep", False)
+    ]
+    assert programs("FOO=1 grep x 2>&1 | sort\nls") == [("grep", True), ("sort", True), ("ls", False)]
+
+
+def test_separators_inside_quotes_do_not_split():
+    assert programs("echo 'a && grep b' \"; grep c\"") == [("echo", False)]
+
+
+def test_grep_is_flagged_in_any_position_unless_piped():
+    assert validator.validate_command("cd x && grep foo") == [GREP_MESSAGE]
+    assert validator.validate_command("(grep foo file)") == [GREP_MESSAGE]
+    assert validator.validate_command("cat f | grep foo") == []
+    assert validator.validate_command("echo grep; /usr/bin/grep x f") == [GREP_MESSAGE]
+
+
+def test_find_name_with_quoted_path():
+    assert validator.validate_command('find "my dir" -name x') == [FIND_MESSAGE]
+    assert validator.validate_command("ls && find . -name '*.py'") == [FIND_MESSAGE]
+    assert validator.validate_command("find . -type f") == []
+
+
+def test_heredoc_body_is_not_validated():
+    command = "cat <<EOF > notes.txt\ngrep foo bar\nfind . -name x\nEOF\necho done"
+    assert validator.validate_command(command) == []
+    assert [argv[0] for argv, _ in validator._split_segments(command)] == ["cat", "echo"]
+
+
+def test_commands_after_heredoc_are_validated():
+    assert validator.validate_command("cat <<'EOF'\ngrep foo\nEOF\ngrep bar file") == [
+        GREP_MESSAGE
+    ]
+
+
+def test_heredoc_variants():
+    # <<- strips leading tabs from the delimiter line; several heredocs share a line
+    assert validator.validate_command("cat <<-END | wc -l\n\tgrep foo\n\tEND\n") == []
+    assert validator.validate_command('cat <<A <<"B"\ngrep a\nA\ngrep b\nB\nls') == []
+
+
+def test_here_string_is_not_a_heredoc():
+    assert validator.validate_command("cat <<<'x'\ngrep y f") == [GREP_MESSAGE]
+
+
+def test_server_answers_malformed_requests_and_keeps_serving():
+    requests = [
+        {"tool_name": "Bash", "tool_input": "grep foo"},
+        {"tool_name": "Bash", "tool_input": {"command": ["grep", "foo"]}},
+        "not json",
+        {"tool_name": "Bash", "tool_input": {"command": "grep foo f"}},
+    ]
+    stdin = io.StringIO(
+        "".join((r if isinstance(r, str) else json.dumps(r)) + "\n" for r in requests)
+    )
+    stdout = io.StringIO()
+    validator.serve(stdin, stdout)
+    replies = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert [reply["exit_code"] for reply in replies] == [1, 1, 1, 2]
+
+
+def test_validate_many_reports_only_commands_with_issues():
+    commands = ["ls -la", "grep foo f", "cat f | grep foo", "find . -name x && grep y f"]
+    assert validator.validate_many(iter(commands)) == [
+        ("grep foo f", [GREP_MESSAGE]),
+        ("find . -name x && grep y f", [FIND_MESSAGE, GREP_MESSAGE]),
+    ]
+    assert validator.validate_many([]) == []
+
+
+def test_history_mode_exit_code(tmp_path):
+    script = Path(validator.__file__)
+    history = tmp_path / "history"
+    history.write_text("ls\n\ngrep foo f\n")
+    result = subprocess.run(
+        [sys.executable, str(script), "--history", str(history)], capture_output=True, text=True
+    )
+    assert result.returncode == 1
+    assert result.stdout.splitlines() == ["grep foo f", f"  • {GREP_MESSAGE}"]
+
+    history.write_text("ls\nrg foo\n")
+    result = subprocess.run(
+        [sys.executable, str(script), "--history", str(history)], capture_output=True, text=True
+    )
+    assert (result.returncode, result.stdout) == (0, "")
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Binary Atlas Metadata
+
+Compact, memory-mappable form of the JSON metadata written by
+generate_atlas.py. A client maps the file and looks frames up by name
+without parsing anything up front:
+
+    header    magic, version, counts and section offsets
+    frames    fixed-size little-endian records, one per frame
+    index     open-addressing hash table (FNV-1a of the name) of frame indices
+    strings   UTF-8 frame names, plus the 'meta' block as compact JSON
+
+Frame record (FRAME_FORMAT, 44 bytes):
+    u32 name hash, u32 name offset, u16 name length, u16 page,
+    u16 frame x/y/w/h, u16 spriteSourceSize x/y/w/h, u16 sourceSize w/h,
+    f32 pivot x/y, u8 flags (1 = rotated, 2 = trimmed), 3 bytes padding
+
+The index holds a power-of-two number of u32 slots (at least twice the
+frame count), EMPTY_SLOT marking free ones; lookups probe linearly from
+hash & (slots - 1).
+
+Usage:
+    python atlas_binary.py --input atlas.bin
+    python atlas_binary.py --input atlas.bin --frame hero_idle_01
+    python atlas_binary.py --input atlas.bin --compare atlas.json
+"""
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+from pathlib import Path
+
+MAGIC = b'ATLB'
+VERSION = 1
+
+# magic, version, flags, frame count, index slots, frames/index/strings offsets,
+# strings size, meta JSON offset/length (within strings)
+HEADER_FORMAT = '<4sHHIIIIIIII'
+FRAME_FORMAT = '<IIHHHHHHHHHHHHffB3x'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+FRAME_SIZE = struct.calcsize(FRAME_FORMAT)
+
+EMPTY_SLOT = 0xFFFFFFFF
+MAX_U16 = 0xFFFF
+
+FLAG_ROTATED = 1
+FLAG_TRIMMED = 2
+
+# Pivots are stored as f32; round back so 0.3 reads as 0.3
+PIVOT_DIGITS = 6
+
+
+def name_hash(name):
+    """32-bit FNV-1a hash of a frame name's UTF-8 bytes"""
+    value = 0x811C9DC5
+    for byte in name.encode('utf-8') if isinstance(name, str) else name:
+        value = ((value ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return value
+
+
+def index_slots(frame_count):
+    """Hash index size: the next power of two of at least twice the frame count"""
+    slots = 1
+    while slots < frame_count * 2:
+        slots *= 2
+    return slots
+
+
+def _u16(value, field, name):
+    """Check a value fits a u16 record field"""
+    if not 0 <= value <= MAX_U16:
+        raise ValueError(f"Frame '{name}': {field} {value} does not fit in 16 bits")
+    return value
+
+
+def encode(metadata):
+    """Encode atlas metadata (generate_atlas.py's JSON structure) to bytes"""
+    frames = metadata['frames']
+    strings = bytearray()
+    records = []
+    slots = index_slots(len(frames))
+    index = [EMPTY_SLOT] * slots
+
+    for frame_index, (name, frame) in enumerate(frames.items()):
+        encoded_name = name.encode('utf-8')
+        if len(encoded_name) > MAX_U16:
+            raise ValueError(f"Frame name too long: {name[:40]}...")
+        hashed = name_hash(encoded_name)
+        slot = hashed & (slots - 1)
+        while index[slot] != EMPTY_SLOT:
+            slot = (slot + 1) & (slots - 1)
+        index[slot] = frame_index
+
+        rect = frame['frame']
+        source_rect = frame['spriteSourceSize']
+        source_size = frame['sourceSize']
+        pivot = frame.get('pivot', {'x': 0.5, 'y': 0.5})
+        flags = ((FLAG_ROTATED if frame.get('rotated') else 0)
+                 | (FLAG_TRIMMED if frame.get('trimmed') else 0))
+        records.append(struct.pack(
+            FRAME_FORMAT,
+            hashed, len(strings), len(encoded_name), _u16(frame.get('page', 0), 'page', name),
+            *(_u16(rect[key], f'frame.{key}', name) for key in 'xywh'),
+            *(_u16(source_rect[key], f'spriteSourceSize.{key}', name) for key in 'xywh'),
+            _u16(source_size['w'], 'sourceSize.w', name), _u16(source_size['h'], 'sourceSize.h', name),
+            pivot['x'], pivot['y'], flags
+        ))
+        strings += encoded_name
+
+    meta = json.dumps(metadata.get('meta', {}), separators=(',', ':')).encode('utf-8')
+    meta_offset = len(strings)
+    strings += meta
+
+    frames_offset = HEADER_SIZE
+    index_offset = frames_offset + FRAME_SIZE * len(records)
+    strings_offset = index_offset + 4 * slots
+    header = struct.pack(
+        HEADER_FORMAT, MAGIC, VERSION, 0, len(records), slots,
+        frames_offset, index_offset, strings_offset, len(strings), meta_offset, len(meta)
+    )
+    return b''.join([header, *records, struct.pack(f'<{slots}I', *index), bytes(strings)])
+
+
+def write(metadata, path):
+    """Write atlas metadata to a binary file; returns its size in bytes"""
+    data = encode(metadata)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+class AtlasReader:
+    """Memory-mapped reader for binary atlas metadata.
+
+    Frames are decoded on access; reader['name'] returns the same dict
+    the JSON metadata has for that frame.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, _, self.frame_count, self.index_slots, self._frames_offset,
+         self._index_offset, self._strings_offset, _, meta_offset, meta_length
+         ) = struct.unpack_from(HEADER_FORMAT, self._data, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a binary atlas file")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"{path}: unsupported binary atlas version {version}")
+        start = self._strings_offset + meta_offset
+        self.meta = json.loads(bytes(self._data[start:start + meta_length]))
+
+    def close(self):
+        """Release the memory map"""
+        self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.frame_count
+
+    def _record(self, frame_index):
+        return struct.unpack_from(FRAME_FORMAT, self._data,
+                                  self._frames_offset + frame_index * FRAME_SIZE)
+
+    def _name(self, record):
+        start = self._strings_offset + record[1]
+        return bytes(self._data[start:start + record[2]])
+
+    def name(self, frame_index):
+        """Name of the frame at a given index"""
+        return self._name(self._record(frame_index)).decode('utf-8')
+
+    def frame(self, frame_index):
+        """Decode the frame at a given index into its JSON dict"""
+        (_, _, _, page, x, y, w, h, source_x, source_y, source_w, source_h,
+         size_w, size_h, pivot_x, pivot_y, flags) = self._record(frame_index)
+        return {
+            'frame': {'x': x, 'y': y, 'w': w, 'h': h},
+            'page': page,
+            'rotated': bool(flags & FLAG_ROTATED),
+            'trimmed': bool(flags & FLAG_TRIMMED),
+            'spriteSourceSize': {'x': source_x, 'y': source_y, 'w': source_w, 'h': source_h},
+            'sourceSize': {'w': size_w, 'h': size_h},
+            'pivot': {'x': round(pivot_x, PIVOT_DIGITS), 'y': round(pivot_y, PIVOT_DIGITS)}
+        }
+
+    def find(self, name):
+        """Index of the named frame, or None"""
+        encoded_name = name.encode('utf-8')
+        hashed = name_hash(encoded_name)
+        mask = self.index_slots - 1
+        slot = hashed & mask
+        while True:
+            frame_index, = struct.unpack_from('<I', self._data, self._index_offset + slot * 4)
+            if frame_index == EMPTY_SLOT:
+                return None
+            record = self._record(frame_index)
+            if record[0] == hashed and self._name(record) == encoded_name:
+                return frame_index
+            slot = (slot + 1) & mask
+
+    def __contains__(self, name):
+        return self.find(name) is not None
+
+    def __getitem__(self, name):
+        frame_index = self.find(name)
+        if frame_index is None:
+            raise KeyError(name)
+        return self.frame(frame_index)
+
+    def get(self, name, default=None):
+        frame_index = self.find(name)
+        return default if frame_index is None else self.frame(frame_index)
+
+    def __iter__(self):
+        """Iterate over frame names in file order"""
+        return (self.name(frame_index) for frame_index in range(self.frame_count))
+
+    def to_metadata(self):
+        """Decode the whole file back into the JSON metadata structure"""
+        return {
+            'meta': self.meta,
+            'frames': {self.name(i): self.frame(i) for i in range(self.frame_count)}
+        }
+
+
+def compare(reader, metadata):
+    """List differences between a binary file and JSON metadata (empty if equal)"""
+    problems = []
+    if reader.meta != metadata.get('meta', {}):
+        problems.append("meta block differs")
+    frames = metadata['frames']
+    if len(reader) != len(frames):
+        problems.append(f"{len(reader)} frames in binary file, {len(frames)} in JSON")
+    for name, frame in frames.items():
+        decoded = reader.get(name)
+        if decoded is None:
+            problems.append(f"{name}: missing")
+            continue
+        expected = dict(frame, pivot=frame.get('pivot', {'x': 0.5, 'y': 0.5}))
+        if decoded != expected:
+            problems.append(f"{name}: {decoded} != {expected}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect binary atlas metadata')
+    parser.add_argument('--input', required=True, help='Binary atlas metadata file')
+    parser.add_argument('--frame', action='append', help='Print a frame by name (repeatable)')
+    parser.add_argument('--compare', metavar='JSON',
+                        help='Check the file round-trips the given JSON metadata')
+
+    args = parser.parse_args()
+
+    try:
+        reader = AtlasReader(args.input)
+    except (OSError, ValueError, struct.error) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    with reader:
+        print(f"{args.input}: {len(reader)} frames, {len(reader.meta.get('pages', []))} page(s), "
+              f"{Path(args.input).stat().st_size / 1024:.1f} KB")
+
+        for name in args.frame or []:
+            frame = reader.get(name)
+            if frame is None:
+                print(f"Error: no frame named '{name}'")
+                sys.exit(1)
+            print(f"{name}: {json.dumps(frame)}")
+
+        if args.compare:
+            with open(args.compare, 'r') as f:
+                problems = compare(reader, json.load(f))
+            if problems:
+                print(f"Round-trip check failed ({len(problems)} difference(s)):")
+                for problem in problems[:20]:
+                    print(f"  {problem}")
+                sys.exit(1)
+            print(f"Round-trip check passed against {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
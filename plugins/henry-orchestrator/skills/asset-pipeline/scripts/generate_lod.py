@@ -15,11 +15,21 @@ Requirements:
 
 Usage:
     python generate_lod.py --input model.obj --output model_lod --levels 4 --ratios 1.0,0.5,0.25,0.1
+    python generate_lod.py --input scan.obj --output scan_lod --strategy progressive
+    python generate_lod.py --input model.obj --output model_lod --export-collapses
+    python generate_lod.py --input assets_source/models --output assets_processed/lods --workers 8
+    python generate_lod.py --input scan.obj --output scan_lod --compare-strategies
 """
 
 import argparse
+import contextlib
+import hashlib
+import io
 import json
+import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 try:
@@ -29,6 +39,187 @@ except ImportError:
     print("Error: Required libraries missing. Install with: pip install trimesh numpy")
     sys.exit(1)
 
+import progressive_mesh
+
+
+# How LOD levels are simplified:
+# - independent: one after another, each from the source mesh
+# - parallel: each from the source mesh, across a process pool
+# - progressive: each from the previous level (smaller inputs, errors accumulate)
+# - collapse: one recorded edge-collapse pass, replayed to each level
+#   (see progressive_mesh.py; the sequence can be exported for continuous LOD).
+#   Pure Python and half-edge only, so it is slower than the others and its
+#   error higher; use it when the collapse sequence itself is needed.
+STRATEGIES = ('independent', 'parallel', 'progressive', 'collapse')
+DEFAULT_STRATEGY = 'independent'
+
+# Points sampled per surface for the LOD error estimate
+ERROR_SAMPLES = 2000
+
+# Meshes up to this many faces are measured against every triangle, in
+# batches of at most BRUTE_FORCE_PAIRS (point, triangle) pairs
+BRUTE_FORCE_FACES = 256
+BRUTE_FORCE_PAIRS = 200000
+
+# Model files picked up in directory mode ('source.formats' in config overrides)
+MESH_FORMATS = ('obj', 'fbx', 'gltf', 'glb', 'ply', 'stl', 'off')
+
+
+def simplify_level(config, mesh, target_face_count, level):
+    """Simplify one LOD level (process pool worker); returns (mesh, seconds)"""
+    start = time.perf_counter()
+    lod_mesh = LODGenerator(config)._simplify_mesh(mesh, target_face_count, level)
+    return lod_mesh, time.perf_counter() - start
+
+
+def file_hash(path):
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def generate_model(config, input_path, output_base, levels, ratios, strategy, export_collapses):
+    """Generate and export one model's LOD chain (batch worker).
+
+    Output is captured; returns the model's summary, or {'failed': reason}.
+    """
+    start = time.perf_counter()
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            generator = LODGenerator(dict(config, source_mesh=str(input_path)))
+            generator.load_mesh(input_path)
+            generator.generate_lod_chain(levels, ratios, strategy)
+            generator.export_lods(output_base, export_collapses=export_collapses)
+    except (Exception, SystemExit) as e:
+        lines = log.getvalue().strip().splitlines()
+        return {'failed': lines[-1] if lines else str(e) or type(e).__name__}
+
+    files = [f"{output_base}_lods.json"]
+    files += [f"{output_base}_LOD{lod['level']}.obj" for lod in generator.lod_meshes]
+    if export_collapses and generator.progressive_mesh is not None:
+        files.append(f"{output_base}_pm.bin")
+    return {
+        'metadata': files[0],
+        'files': files,
+        'time': round(time.perf_counter() - start, 3),
+        'lods': [
+            {
+                'level': lod['level'],
+                'face_count': lod['face_count'],
+                'vertex_count': lod['vertex_count'],
+                'error': lod['error']
+            }
+            for lod in generator.lod_meshes
+        ]
+    }
+
+
+class SurfaceIndex:
+    """Uniform grid over a mesh's triangles for nearest-surface queries.
+
+    Triangles are binned by centroid into cubic cells about two mean edge
+    lengths wide (wider for meshes of long, thin triangles, up to 1/16 of
+    the mesh's extent). A query visits growing shells of cells around the point
+    until no unvisited triangle can be closer: one whose centroid lies
+    outside the shells is at least (radius * cell - reach) away, reach
+    being the largest centroid-to-corner distance. Stands in for an
+    rtree-backed proximity query, which trimesh needs extra packages for.
+    """
+
+    def __init__(self, mesh):
+        self.triangles = np.asarray(mesh.triangles).view(np.ndarray)
+        centroids = self.triangles.mean(axis=1)
+        self.reach = float(np.linalg.norm(self.triangles - centroids[:, None], axis=2).max())
+        extent = float(np.ptp(centroids, axis=0).max())
+        self.cell = max(float(mesh.edges_unique_length.mean()) * 2, min(self.reach, extent / 16), 1e-9)
+
+        keys = np.floor(centroids / self.cell).astype(np.int64)
+        self.key_bounds = keys.min(axis=0), keys.max(axis=0)
+        order = np.lexsort(keys.T[::-1])
+        unique_keys, starts = np.unique(keys[order], axis=0, return_index=True)
+        self.cells = {
+            tuple(key): faces
+            for key, faces in zip(unique_keys.tolist(), np.split(order, starts[1:]))
+        }
+        self.shells = []
+
+    def shell(self, radius):
+        """Cell offsets at exactly the given Chebyshev radius"""
+        while len(self.shells) <= radius:
+            span = np.arange(-len(self.shells), len(self.shells) + 1)
+            offsets = np.stack(np.meshgrid(span, span, span, indexing='ij'), axis=-1).reshape(-1, 3)
+            self.shells.append(offsets[np.abs(offsets).max(axis=1) == len(self.shells)])
+        return self.shells[radius]
+
+    def distances(self, points):
+        """Distance from each point to the nearest triangle.
+
+        Points still unresolved at a radius are batched into a single
+        closest-point call over all their (point, triangle) pairs.
+        """
+        if len(self.triangles) <= BRUTE_FORCE_FACES:
+            return self._brute_force_distances(points)
+
+        centers = np.floor(points / self.cell).astype(np.int64)
+        # Shell radius by which every cell of the grid has been visited
+        limits = np.maximum(np.abs(centers - self.key_bounds[0]),
+                            np.abs(centers - self.key_bounds[1])).max(axis=1)
+        best = np.full(len(points), np.inf)
+        pending = np.arange(len(points))
+        for radius in range(int(limits.max()) + 1):
+            if len(pending) == 0:
+                break
+            owners, faces = [], []
+            offsets = self.shell(radius)
+            for point_index in pending:
+                for key in map(tuple, (offsets + centers[point_index]).tolist()):
+                    cell_faces = self.cells.get(key)
+                    if cell_faces is not None:
+                        owners.append(np.full(len(cell_faces), point_index))
+                        faces.append(cell_faces)
+            if faces:
+                owners = np.concatenate(owners)
+                faces = np.concatenate(faces)
+                closest = trimesh.triangles.closest_point(self.triangles[faces], points[owners])
+                np.minimum.at(best, owners, np.linalg.norm(closest - points[owners], axis=1))
+            pending = pending[(best[pending] > radius * self.cell - self.reach)
+                              & (limits[pending] > radius)]
+        return best
+
+    def _brute_force_distances(self, points):
+        count = len(self.triangles)
+        step = max(1, BRUTE_FORCE_PAIRS // count)
+        best = np.empty(len(points))
+        for start in range(0, len(points), step):
+            chunk = np.repeat(points[start:start + step], count, axis=0)
+            closest = trimesh.triangles.closest_point(
+                np.tile(self.triangles, (len(chunk) // count, 1, 1)), chunk)
+            best[start:start + step] = np.linalg.norm(closest - chunk, axis=1).reshape(-1, count).min(axis=1)
+        return best
+
+
+def surface_error(source, lod_mesh, samples=ERROR_SAMPLES, source_index=None):
+    """Measure how far an LOD strays from the source surface.
+
+    Points sampled on each surface are measured against the exact nearest
+    point of the other (both ways, as in Metro-style comparisons).
+    Returns (mean, max) as a fraction of the source bounding box diagonal.
+    """
+    if len(lod_mesh.faces) == 0:
+        return 1.0, 1.0
+    diagonal = np.linalg.norm(source.bounds[1] - source.bounds[0]) or 1.0
+    source_index = source_index or SurfaceIndex(source)
+    distances = []
+    for mesh, index in ((source, SurfaceIndex(lod_mesh)), (lod_mesh, source_index)):
+        points, _ = trimesh.sample.sample_surface(mesh, samples, seed=0)
+        distances.append(index.distances(points))
+    distances = np.concatenate(distances) / diagonal
+    return float(distances.mean()), float(distances.max())
+
 
 class LODGenerator:
     """Generates LOD chain for 3D models"""
@@ -37,6 +228,9 @@ class LODGenerator:
         self.config = config
         self.source_mesh = None
         self.lod_meshes = []
+        self.strategy = None
+        self.chain_time = 0
+        self.progressive_mesh = None
 
     def load_mesh(self, input_path):
         """Load source 3D mesh"""
@@ -44,40 +238,104 @@ class LODGenerator:
 
         try:
             self.source_mesh = trimesh.load(input_path, force='mesh')
+            if len(self.source_mesh.faces) == 0:
+                raise ValueError("no faces")
             print(f"Loaded mesh with {len(self.source_mesh.vertices)} vertices, "
                   f"{len(self.source_mesh.faces)} faces")
         except Exception as e:
             print(f"Error loading mesh: {e}")
             sys.exit(1)
 
-    def generate_lod_chain(self, levels, ratios):
-        """Generate LOD meshes at specified ratios"""
-        print(f"\nGenerating {levels} LOD levels...")
+    def generate_lod_chain(self, levels, ratios, strategy=DEFAULT_STRATEGY, workers=None):
+        """Generate LOD meshes at specified ratios
 
-        self.lod_meshes = []
+        'strategy' is one of STRATEGIES. Every level's target face count
+        is relative to the source mesh; the progressive strategy only
+        changes which mesh is simplified to reach it. Each level records
+        its simplification time (for collapse, the replay; the single pass
+        counts towards chain_time only) and surface error.
+        """
+        print(f"\nGenerating {levels} LOD levels ({strategy})...")
+
+        start = time.perf_counter()
+        source_faces = len(self.source_mesh.faces)
+        targets = [int(source_faces * ratio) for ratio in ratios]
+        results = {0: (self.source_mesh, 0.0)}  # LOD0 is the original mesh
+        self.progressive_mesh = None
+
+        if strategy == 'collapse':
+            self.progressive_mesh = progressive_mesh.ProgressiveMesh.build(
+                self.source_mesh.vertices, self.source_mesh.faces)
+            print(f"  Recorded {self.progressive_mesh.collapse_count} collapses in "
+                  f"{time.perf_counter() - start:.2f}s")
+            for level in range(1, len(ratios)):
+                level_start = time.perf_counter()
+                vertices, faces = self.progressive_mesh.extract(targets[level])
+                results[level] = (trimesh.Trimesh(vertices, faces, process=False),
+                                  time.perf_counter() - level_start)
+        elif strategy == 'parallel':
+            workers = min(workers or os.cpu_count() or 1, max(1, len(ratios) - 1))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    level: executor.submit(simplify_level, self.config, self.source_mesh,
+                                           targets[level], level)
+                    for level in range(1, len(ratios))
+                }
+                results.update({level: future.result() for level, future in futures.items()})
+        else:
+            previous = self.source_mesh
+            for level in range(1, len(ratios)):
+                base = previous if strategy == 'progressive' else self.source_mesh
+                results[level] = simplify_level(self.config, base, targets[level], level)
+                previous = results[level][0]
+        self.chain_time = time.perf_counter() - start
+        self.strategy = strategy
 
+        self.lod_meshes = []
+        samples = self.config.get('error_samples', ERROR_SAMPLES)
+        source_index = SurfaceIndex(self.source_mesh) if len(ratios) > 1 else None
         for level, ratio in enumerate(ratios):
+            lod_mesh, seconds = results[level]
             if level == 0:
-                # LOD0 is the original mesh
-                lod_mesh = self.source_mesh.copy()
+                lod_mesh = lod_mesh.copy()
+                error = (0.0, 0.0)
                 print(f"LOD{level}: {len(lod_mesh.faces)} faces (original, ratio {ratio})")
             else:
-                # Simplify mesh to target ratio
-                target_face_count = int(len(self.source_mesh.faces) * ratio)
-                lod_mesh = self._simplify_mesh(self.source_mesh, target_face_count, level)
-
-                actual_ratio = len(lod_mesh.faces) / len(self.source_mesh.faces)
-                print(f"LOD{level}: {len(lod_mesh.faces)} faces (target {target_face_count}, "
-                      f"ratio {actual_ratio:.2f})")
+                error = surface_error(self.source_mesh, lod_mesh, samples, source_index)
+                actual_ratio = len(lod_mesh.faces) / source_faces
+                print(f"LOD{level}: {len(lod_mesh.faces)} faces (target {targets[level]}, "
+                      f"ratio {actual_ratio:.2f}, {seconds:.2f}s, error {error[0]:.5f} mean / "
+                      f"{error[1]:.5f} max)")
 
             self.lod_meshes.append({
                 'level': level,
                 'mesh': lod_mesh,
                 'ratio': ratio,
                 'face_count': len(lod_mesh.faces),
-                'vertex_count': len(lod_mesh.vertices)
+                'vertex_count': len(lod_mesh.vertices),
+                'time': seconds,
+                'error': {'mean': error[0], 'max': error[1]}
             })
 
+    def compare_strategies(self, levels, ratios, workers=None):
+        """Run every strategy and print their time and error side by side.
+
+        The chain of the last strategy run is kept in lod_meshes.
+        """
+        rows = {}
+        for strategy in STRATEGIES:
+            self.generate_lod_chain(levels, ratios, strategy, workers)
+            rows[strategy] = (self.chain_time, self.lod_meshes[1:])
+
+        print("\nStrategy comparison (error: mean / max, fraction of bounding box diagonal):")
+        for strategy, (seconds, lods) in rows.items():
+            print(f"  {strategy:<12} {seconds:>8.2f}s  " + "  ".join(
+                f"LOD{lod['level']} {lod['face_count']}f "
+                f"{lod['error']['mean']:.5f}/{lod['error']['max']:.5f}"
+                for lod in lods
+            ))
+        return rows
+
     def _simplify_mesh(self, mesh, target_face_count, level):
         """
         Simplify mesh using trimesh's simplification.
@@ -95,7 +353,7 @@ class LODGenerator:
             try:
                 # Simple vertex clustering
                 # For better results, use dedicated mesh simplification libraries
-                simplified = mesh.simplify_quadric_decimation(target_face_count)
+                simplified = mesh.simplify_quadric_decimation(face_count=target_face_count)
 
                 # If still too many faces, apply aggressive simplification
                 if len(simplified.faces) > target_face_count * 1.2:
@@ -125,8 +383,12 @@ class LODGenerator:
 
         return max(pitch, 0.01)  # Minimum pitch
 
-    def export_lods(self, output_base_path, format='obj'):
-        """Export LOD meshes"""
+    def export_lods(self, output_base_path, format='obj', export_collapses=False):
+        """Export LOD meshes
+
+        With export_collapses (collapse strategy only), the progressive
+        mesh is also written to <output>_pm.bin for continuous LOD.
+        """
         print(f"\nExporting LOD meshes...")
 
         output_path = Path(output_base_path)
@@ -134,6 +396,7 @@ class LODGenerator:
 
         metadata = {
             'source_mesh': str(self.config.get('source_mesh', '')),
+            'strategy': self.strategy,
             'lod_count': len(self.lod_meshes),
             'lods': []
         }
@@ -153,9 +416,23 @@ class LODGenerator:
                 'file': str(output_file),
                 'ratio': lod_data['ratio'],
                 'face_count': lod_data['face_count'],
-                'vertex_count': lod_data['vertex_count']
+                'vertex_count': lod_data['vertex_count'],
+                'time': round(lod_data['time'], 3),
+                'error': lod_data['error']
             })
 
+        if export_collapses and self.progressive_mesh is not None:
+            sequence_file = f"{output_path}_pm.bin"
+            size = self.progressive_mesh.write(sequence_file)
+            metadata['collapse_sequence'] = {
+                'file': sequence_file,
+                'vertex_count': len(self.progressive_mesh.vertices),
+                'face_count': len(self.progressive_mesh.faces),
+                'collapse_count': self.progressive_mesh.collapse_count,
+                'min_face_count': self.progressive_mesh.min_face_count
+            }
+            print(f"  Collapse sequence: {sequence_file} ({size / 1024:.1f} KB)")
+
         # Save metadata
         metadata_file = f"{output_path}_lods.json"
         with open(metadata_file, 'w') as f:
@@ -206,6 +483,211 @@ class LODGenerator:
         return distances
 
 
+class BatchLODGenerator:
+    """Generates LOD chains for every model under a directory.
+
+    Models are processed in a process pool, each exported as in single
+    model mode (<output>/<relative path>_LOD*.obj and _lods.json). A
+    model's content hash plus the ratios, strategy and error settings key
+    a cache in the output directory; models whose key matches and whose
+    outputs still exist are skipped. lod_index.json aggregates them all.
+    """
+
+    CACHE_FILE = 'lod_cache.json'
+    INDEX_FILE = 'lod_index.json'
+
+    # Bump when the cache layout or LOD output changes
+    CACHE_VERSION = 1
+
+    # Completed models between cache writes during a run
+    CACHE_SAVE_INTERVAL = 25
+
+    def __init__(self, config, levels, ratios, strategy=DEFAULT_STRATEGY,
+                 export_collapses=False, workers=None):
+        self.config = config
+        self.levels = levels
+        self.ratios = ratios
+        # The pool already runs models side by side
+        self.strategy = 'independent' if strategy == 'parallel' else strategy
+        self.export_collapses = export_collapses
+        self.workers = workers or os.cpu_count() or 1
+        self.models = {}  # Relative path -> summary
+        self.failed = {}  # Relative path -> reason
+
+    def find_models(self, input_dir):
+        """Model files under a directory, with distinct output names"""
+        formats = self.config.get('source', {}).get('formats', MESH_FORMATS)
+        suffixes = {f".{extension.lower().lstrip('.')}" for extension in formats}
+        paths = sorted(
+            path for path in Path(input_dir).glob('**/*')
+            if path.suffix.lower() in suffixes and path.is_file()
+        )
+
+        # model.fbx next to model.obj would share model_LOD*.obj
+        stems = {}
+        for path in paths:
+            stems.setdefault(path.with_suffix(''), []).append(path)
+        models = {}
+        for stem, group in stems.items():
+            for path in group:
+                name = stem if len(group) == 1 else stem.with_name(f"{stem.name}_{path.suffix[1:]}")
+                models[path] = name.relative_to(input_dir)
+        return models
+
+    def cache_key(self, content_hash):
+        """Hash of a model's content and the settings that shape its LODs"""
+        relevant = {
+            'hash': content_hash,
+            'levels': self.levels,
+            'ratios': self.ratios,
+            'strategy': self.strategy,
+            'error_samples': self.config.get('error_samples', ERROR_SAMPLES),
+            'export_collapses': self.export_collapses,
+            'version': self.CACHE_VERSION
+        }
+        return hashlib.md5(json.dumps(relevant, sort_keys=True).encode()).hexdigest()
+
+    def load_cache(self, output_dir):
+        """Previous run's cache entries, keyed by relative model path"""
+        try:
+            with open(Path(output_dir) / self.CACHE_FILE, 'r') as f:
+                return json.load(f).get('models', {})
+        except (OSError, ValueError):
+            return {}
+
+    def run(self, input_dir, output_dir, use_cache=True):
+        """Generate LODs for every model that is new or changed"""
+        models = self.find_models(input_dir)
+        print(f"Found {len(models)} models in {input_dir}")
+        cache = self.load_cache(output_dir) if use_cache else {}
+
+        keys = {}
+        pending = []
+        for path, name in models.items():
+            relative = str(path.relative_to(input_dir))
+            content_hash = file_hash(path)
+            keys[relative] = self.cache_key(content_hash)
+            entry = cache.get(relative)
+            if (entry and entry['key'] == keys[relative]
+                    and all(Path(file).exists() for file in entry['summary']['files'])):
+                self.models[relative] = dict(entry['summary'], hash=content_hash, cached=True)
+            else:
+                pending.append((relative, path, Path(output_dir) / name, content_hash))
+        if self.models:
+            print(f"  {len(self.models)} models unchanged since last run")
+
+        # The cache is saved as models complete and whatever happens, so an
+        # interrupted run does not lose the models it already built
+        try:
+            if pending:
+                self.generate(pending, output_dir, keys)
+        finally:
+            self.models = dict(sorted(self.models.items()))
+            self.save(input_dir, output_dir, keys)
+
+    def generate(self, pending, output_dir, keys):
+        """Generate pending models in a process pool.
+
+        A worker that dies (e.g. out of memory) breaks the pool: its model
+        and every one still queued are recorded as failed and retried on
+        the next run.
+        """
+        print(f"Generating LODs for {len(pending)} models ({self.strategy}, "
+              f"{min(self.workers, len(pending))} workers)...")
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(pending))) as executor:
+            futures = {
+                executor.submit(generate_model, self.config, path, output_base, self.levels,
+                                self.ratios, self.strategy, self.export_collapses):
+                    (relative, content_hash)
+                for relative, path, output_base, content_hash in pending
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                relative, content_hash = futures[future]
+                try:
+                    summary = future.result()
+                except Exception as e:  # BrokenProcessPool, unpicklable result, ...
+                    summary = {'failed': f"worker error: {str(e) or type(e).__name__}"}
+                if 'failed' in summary:
+                    self.failed[relative] = summary['failed']
+                    print(f"  [{done}/{len(pending)}] {relative}: failed ({summary['failed']})")
+                else:
+                    self.models[relative] = dict(summary, hash=content_hash, cached=False)
+                    print(f"  [{done}/{len(pending)}] {relative}: {summary['time']:.2f}s")
+                if done % self.CACHE_SAVE_INTERVAL == 0:
+                    self.save_cache(output_dir, keys)
+
+    def save_cache(self, output_dir, keys):
+        """Write the cache of generated models, replacing the file atomically"""
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        cache = {
+            'models': {
+                relative: {
+                    'key': keys[relative],
+                    'summary': {key: value for key, value in summary.items()
+                                if key not in ('hash', 'cached')}
+                }
+                for relative, summary in self.models.items()
+            }
+        }
+        tmp_file = output_dir / f"{self.CACHE_FILE}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(cache, f)
+        os.replace(tmp_file, output_dir / self.CACHE_FILE)
+
+    def save(self, input_dir, output_dir, keys):
+        """Write the cache and the aggregate index"""
+        self.save_cache(output_dir, keys)
+        output_dir = Path(output_dir)
+        index = {
+            'source_directory': str(input_dir),
+            'strategy': self.strategy,
+            'ratios': self.ratios,
+            'model_count': len(self.models),
+            'models': {
+                relative: {
+                    'hash': summary['hash'],
+                    'metadata': summary['metadata'],
+                    'time': summary['time'],
+                    'cached': summary['cached'],
+                    'lods': summary['lods']
+                }
+                for relative, summary in self.models.items()
+            },
+            'failed': self.failed
+        }
+        index_file = output_dir / self.INDEX_FILE
+        with open(index_file, 'w') as f:
+            json.dump(index, f, indent=2)
+        print(f"  Index: {index_file}")
+
+    def print_summary(self):
+        """Print faces, vertices, time and error per model"""
+        print("\n" + "="*60)
+        print("LOD SUMMARY")
+        print("="*60)
+
+        for relative, summary in self.models.items():
+            lods = summary['lods']
+            faces = '/'.join(str(lod['face_count']) for lod in lods)
+            vertices = '/'.join(str(lod['vertex_count']) for lod in lods)
+            worst = max(lods, key=lambda lod: lod['error']['max'])['error']
+            print(f"{relative}{' (cached)' if summary['cached'] else ''}")
+            print(f"  faces {faces}, vertices {vertices}, {summary['time']:.2f}s, "
+                  f"error {worst['mean']:.5f} mean / {worst['max']:.5f} max")
+        for relative, reason in self.failed.items():
+            print(f"{relative}: FAILED ({reason})")
+
+        generated = [summary for summary in self.models.values() if not summary['cached']]
+        source_faces = sum(summary['lods'][0]['face_count'] for summary in self.models.values())
+        lod_faces = sum(lod['face_count'] for summary in self.models.values()
+                        for lod in summary['lods'][1:])
+        print(f"\nModels: {len(self.models)} ({len(generated)} generated, "
+              f"{len(self.models) - len(generated)} cached, {len(self.failed)} failed)")
+        print(f"Faces: {source_faces} source, {lod_faces} across lower LODs")
+        print(f"Generation time: {sum(summary['time'] for summary in generated):.2f}s")
+
+
 def load_config(config_path):
     """Load configuration from JSON file"""
     if config_path and Path(config_path).exists():
@@ -216,8 +698,9 @@ def load_config(config_path):
 
 def main():
     parser = argparse.ArgumentParser(description='Generate LOD chain for 3D model')
-    parser.add_argument('--input', required=True, help='Input 3D model file')
-    parser.add_argument('--output', required=True, help='Output base path for LOD files')
+    parser.add_argument('--input', required=True, help='Input 3D model file or directory')
+    parser.add_argument('--output', required=True,
+                        help='Output base path for LOD files (directory for directory input)')
     parser.add_argument('--config', help='Configuration JSON file')
     parser.add_argument('--levels', type=int, default=4, help='Number of LOD levels')
     parser.add_argument('--ratios', default='1.0,0.5,0.25,0.1',
@@ -225,6 +708,19 @@ def main():
     parser.add_argument('--type', default='medium_props',
                         choices=['small_props', 'medium_props', 'characters', 'buildings'],
                         help='Object type for distance recommendations')
+    parser.add_argument('--strategy', choices=STRATEGIES,
+                        help=f'How LOD levels are simplified (default: {DEFAULT_STRATEGY}, '
+                             f'or lod_strategy in config)')
+    parser.add_argument('--workers', type=int,
+                        help='Worker processes for the parallel strategy or directory input '
+                             '(default: CPU count)')
+    parser.add_argument('--compare-strategies', action='store_true',
+                        help='Run every strategy, compare time and error, export the last')
+    parser.add_argument('--export-collapses', action='store_true',
+                        help='Also write the collapse sequence (<output>_pm.bin) for continuous LOD '
+                             '(uses the collapse strategy unless --strategy is given)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Directory input: regenerate every model, ignoring the LOD cache')
 
     args = parser.parse_args()
 
@@ -237,12 +733,32 @@ def main():
     # Load config
     config = load_config(args.config)
     config['source_mesh'] = args.input
+    workers = args.workers or config.get('workers')
+    export_collapses = args.export_collapses or config.get('export_collapse_sequence', False)
+    # Exporting the collapse sequence picks the collapse strategy unless one is given
+    strategy = (args.strategy or config.get('lod_strategy')
+                or ('collapse' if export_collapses else DEFAULT_STRATEGY))
+
+    input_path = Path(args.input)
+    if input_path.is_dir():
+        if args.compare_strategies:
+            print("Error: --compare-strategies needs a single model as --input")
+            sys.exit(1)
+        batch = BatchLODGenerator(config, args.levels, ratios, strategy, export_collapses, workers)
+        batch.run(input_path, args.output, use_cache=not args.no_cache)
+        batch.print_summary()
+        return
 
     # Generate LODs
     generator = LODGenerator(config)
     generator.load_mesh(args.input)
-    generator.generate_lod_chain(args.levels, ratios)
-    generator.export_lods(args.output)
+    if args.compare_strategies:
+        generator.compare_strategies(args.levels, ratios, args.workers)
+    else:
+        generator.generate_lod_chain(args.levels, ratios, strategy, workers)
+    if export_collapses and generator.progressive_mesh is None:
+        print("Warning: --export-collapses needs the collapse strategy; no sequence written")
+    generator.export_lods(args.output, export_collapses=export_collapses)
 
     # Calculate recommended distances
     # Estimate object size from mesh bounds
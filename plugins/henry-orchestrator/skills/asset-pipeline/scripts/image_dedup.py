@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Image Deduplication Helpers
+
+Content hashing and perceptual near-duplicate detection shared by
+generate_atlas.py and process_animation.py.
+
+- content_hash(): exact hash of trimmed RGBA pixels (and their size), so
+  sprites that only differ in transparent margin hash the same.
+- dhash(): 256-bit perceptual difference hash, robust to small pixel noise.
+- NearDuplicateIndex: BK-tree over perceptual hashes, bucketed by trimmed
+  size, so near-duplicate lookups stay sub-quadratic on large frame sets.
+  Hash matches are confirmed against the pixels, since small sprites that
+  differ by a pixel shift can still share a perceptual hash.
+
+Requirements:
+    pip install Pillow
+"""
+
+import hashlib
+
+from PIL import Image, ImageChops, ImageStat
+
+DHASH_SIZE = 16
+
+# Largest mean per-channel difference (0-255) between confirmed near-duplicates
+MAX_MEAN_DIFFERENCE = 2.0
+
+
+def content_hash(image):
+    """Hash an RGBA image's pixels together with its size"""
+    digest = hashlib.md5(f"{image.width}x{image.height}:".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def dhash(image, hash_size=DHASH_SIZE):
+    """Compute a perceptual difference hash of an RGBA image.
+
+    The image is composited over black (so transparent pixels count as
+    dark), shrunk to (hash_size + 1) x hash_size grayscale, and each bit
+    records whether a pixel is brighter than its right neighbour.
+    """
+    background = Image.new('RGBA', image.size, (0, 0, 0, 255))
+    gray = Image.alpha_composite(background, image).convert('L')
+    pixels = list(gray.resize((hash_size + 1, hash_size), Image.LANCZOS).getdata())
+
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming(a, b):
+    """Number of differing bits between two hashes"""
+    return bin(a ^ b).count('1')
+
+
+def mean_difference(a, b):
+    """Mean absolute per-channel difference between two same-size images"""
+    return sum(ImageStat.Stat(ImageChops.difference(a, b)).mean) / len(a.getbands())
+
+
+class BKTree:
+    """Burkhard-Keller tree for radius queries under Hamming distance"""
+
+    def __init__(self):
+        self.root = None  # [hash, item, {distance: child}]
+
+    def add(self, hash_value, item):
+        """Insert an item keyed by its hash"""
+        node = [hash_value, item, {}]
+        if self.root is None:
+            self.root = node
+            return
+        current = self.root
+        while True:
+            distance = hamming(hash_value, current[0])
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+
+    def find(self, hash_value, radius):
+        """Return (distance, item) pairs for all items within radius, closest first"""
+        matches = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(hash_value, node[0])
+            if distance <= radius:
+                matches.append((distance, node[1]))
+            # Triangle inequality: only children within radius can match
+            for child_distance, child in node[2].items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+
+class NearDuplicateIndex:
+    """Find near-duplicate images among those added so far.
+
+    Images only match others with the same size, since substituting a
+    differently sized image would change the packed layout. Candidates
+    within the hash threshold must also be within max_difference of each
+    other pixel-wise (see mean_difference).
+    """
+
+    def __init__(self, threshold, max_difference=MAX_MEAN_DIFFERENCE):
+        self.threshold = threshold
+        self.max_difference = max_difference
+        self.trees = {}
+
+    def match_or_add(self, image, item):
+        """Return (distance, item) for the closest near-duplicate of image.
+
+        If there is none, the image is indexed under item as a candidate
+        for later matches and None is returned.
+        """
+        hash_value = dhash(image)
+        tree = self.trees.setdefault(image.size, BKTree())
+        for distance, (candidate, candidate_item) in tree.find(hash_value, self.threshold):
+            if mean_difference(image, candidate) <= self.max_difference:
+                return distance, candidate_item
+        tree.add(hash_value, (image, item))
+        return None
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+NumPy Image Backend
+
+Array versions of the per-sprite image operations used by generate_atlas.py
+and process_animation.py. Sheets are kept as a single preallocated
+uint8[H, W, 4] array; sprites are blitted with slicing and edges extruded
+with broadcast assignment instead of many small PIL crop/paste calls.
+Results are bit-identical to the PIL code paths.
+
+Requirements:
+    pip install numpy
+
+NumPy is optional: the scripts fall back to the PIL path when it is not
+installed (HAVE_NUMPY is False).
+"""
+
+import os
+import tempfile
+
+try:
+    import numpy as np
+    HAVE_NUMPY = True
+except ImportError:
+    np = None
+    HAVE_NUMPY = False
+
+
+def resolve_backend(name):
+    """Resolve a 'backend' config value ('auto', 'pil' or 'numpy')"""
+    if name in (None, 'auto'):
+        return 'numpy' if HAVE_NUMPY else 'pil'
+    if name == 'numpy' and not HAVE_NUMPY:
+        print("Warning: numpy backend requested but numpy is not installed, using PIL")
+        return 'pil'
+    return name
+
+
+def new_sheet(width, height):
+    """Allocate a transparent RGBA sheet"""
+    return np.zeros((height, width, 4), dtype=np.uint8)
+
+
+def alpha_bbox(image):
+    """Return the bounding box of non-transparent pixels, or None.
+
+    Equivalent to Image.getbbox() on an RGBA image (alpha only), using
+    np.any row/column reductions.
+    """
+    alpha = np.asarray(image.getchannel('A'))
+    rows = alpha.any(axis=1)
+    if not rows.any():
+        return None
+    top = int(rows.argmax())
+    bottom = len(rows) - int(rows[::-1].argmax())
+    # Only the rows that contain content need a column reduction
+    cols = alpha[top:bottom].any(axis=0)
+    left = int(cols.argmax())
+    right = len(cols) - int(cols[::-1].argmax())
+    return (left, top, right, bottom)
+
+
+def blit(sheet, pixels, x, y):
+    """Copy an RGBA array into the sheet at (x, y), clipped to the sheet.
+
+    Like Image.paste() without a mask, pixels are replaced, not blended.
+    """
+    height, width = sheet.shape[:2]
+    src_x = max(0, -x)
+    src_y = max(0, -y)
+    dst_x = max(0, x)
+    dst_y = max(0, y)
+    w = min(pixels.shape[1] - src_x, width - dst_x)
+    h = min(pixels.shape[0] - src_y, height - dst_y)
+    if w > 0 and h > 0:
+        sheet[dst_y:dst_y + h, dst_x:dst_x + w] = pixels[src_y:src_y + h, src_x:src_x + w]
+
+
+def clear(sheet, x, y, w, h):
+    """Make a rectangle of the sheet fully transparent"""
+    sheet[max(0, y):max(0, y + h), max(0, x):max(0, x + w)] = 0
+
+
+def extrude_edges(sheet, x, y, w, h, padding):
+    """Repeat the outer rows/columns of the sprite at (x, y) into its padding.
+
+    Matches AtlasGenerator._apply_edge_extrusion: edges are extended
+    straight out and the padding corners are left untouched.
+    """
+    if padding <= 0:
+        return
+    height, width = sheet.shape[:2]
+
+    # Top and bottom edges
+    if y > 0:
+        sheet[max(0, y - padding):y, x:x + w] = sheet[y:y + 1, x:x + w]
+    if y + h < height:
+        sheet[y + h:min(height, y + h + padding), x:x + w] = sheet[y + h - 1:y + h, x:x + w]
+
+    # Left and right edges
+    if x > 0:
+        sheet[y:y + h, max(0, x - padding):x] = sheet[y:y + h, x:x + 1]
+    if x + w < width:
+        sheet[y:y + h, x + w:min(width, x + w + padding)] = sheet[y:y + h, x + w - 1:x + w]
+
+
+class FrameArena:
+    """Append-only store of RGBA frames in a temporary memory-mapped file.
+
+    Frames are written once and read back as read-only array views, so a
+    long sequence only keeps file-backed pages resident instead of every
+    decoded frame. Pickled copies (process pools) refer to the same file;
+    it is only removed by an explicit close().
+    """
+
+    def __init__(self, directory=None):
+        handle, self.path = tempfile.mkstemp(prefix='frames-', suffix='.rgba', dir=directory)
+        os.close(handle)
+        self.size = 0
+        self._map = None
+
+    def append(self, pixels):
+        """Store an RGBA array; returns its (offset, shape) slot"""
+        pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+        with open(self.path, 'ab') as f:
+            pixels.tofile(f)
+        slot = (self.size, pixels.shape)
+        self.size += pixels.nbytes
+        return slot
+
+    def get(self, slot):
+        """Read-only array view of a stored frame"""
+        offset, shape = slot
+        count = shape[0] * shape[1] * shape[2]
+        if self._map is None or len(self._map) < offset + count:
+            # Map again once frames were appended after the last mapping
+            self._map = np.memmap(self.path, dtype=np.uint8, mode='r')
+        return self._map[offset:offset + count].reshape(shape)
+
+    def close(self):
+        """Remove the backing file"""
+        self._map = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __getstate__(self):
+        return {'path': self.path, 'size': self.size, '_map': None}
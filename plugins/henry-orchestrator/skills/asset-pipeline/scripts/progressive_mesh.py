@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Progressive Mesh
+
+Single-pass quadric edge-collapse simplification for generate_lod.py. The
+mesh is simplified once, all the way down, and the collapse sequence is
+recorded; any LOD is then extracted in O(faces) by replaying a prefix of
+the sequence instead of re-running the simplifier for every ratio.
+
+Collapses are half-edge collapses: a vertex merges into a neighbour, which
+keeps its position. Every LOD therefore shares the source vertex buffer
+and differs only in its index buffer, which is what a runtime needs for
+continuous LOD. Vertices are stored in collapse order - the i-th collapse
+removes vertex (vertex_count - 1 - i) - so applying k collapses maps each
+vertex at or above (vertex_count - k) to its parent, repeatedly, until it
+lands below that line. Faces left with a repeated vertex are dropped.
+
+Costs are Garland-Heckbert quadric errors (area-weighted face planes, plus
+heavily weighted planes along open boundaries). A collapse is skipped if
+it would fold a face over or break the link condition (leave the mesh
+non-manifold).
+
+File layout (little-endian, see write() / read()):
+    header       magic, version, flags, vertex/face/collapse counts
+    vertices     f32 x/y/z per vertex, in collapse order
+    faces        u32 a/b/c per face, the full-detail index buffer
+    parents      u32 per vertex: the vertex it collapses into (itself if never)
+    faces_after  u32 per collapse: face count once it has been applied
+
+Usage:
+    python progressive_mesh.py --input model_pm.bin
+    python progressive_mesh.py --input model_pm.bin --ratio 0.3 --output model_30.obj
+"""
+
+import argparse
+import heapq
+import math
+import struct
+import sys
+
+import numpy as np
+
+MAGIC = b'PMSH'
+VERSION = 1
+
+# magic, version, flags, vertex count, face count, collapse count
+HEADER_FORMAT = '<4sHHIII'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# Boundary planes count this much more than face planes, so open edges
+# (holes, cloth hems, UV-less cut-outs) keep their outline
+BOUNDARY_WEIGHT = 100.0
+
+# Skip a collapse if it turns a face normal further than this (cosine)
+MIN_NORMAL_DOT = 0.2
+
+# Stop short of this many faces (a closed mesh bottoms out as a tetrahedron)
+MIN_FACES = 4
+
+
+def vertex_quadrics(vertices, faces):
+    """Sum of area-weighted plane quadrics around each vertex, (V, 4, 4)"""
+    corners = vertices[faces]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    doubled_areas = np.linalg.norm(normals, axis=1)
+    normals /= np.maximum(doubled_areas, 1e-12)[:, None]
+    planes = np.hstack([normals, -(normals * corners[:, 0]).sum(axis=1)[:, None]])
+    face_quadrics = planes[:, :, None] * planes[:, None, :] * (doubled_areas / 2)[:, None, None]
+
+    quadrics = np.zeros((len(vertices), 4, 4))
+    for corner in range(3):
+        np.add.at(quadrics, faces[:, corner], face_quadrics)
+
+    # Open edges belong to one face; constrain them with a plane through
+    # the edge, perpendicular to that face
+    directed = faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+    _, inverse, counts = np.unique(np.sort(directed, axis=1), axis=0,
+                                   return_inverse=True, return_counts=True)
+    boundary = np.nonzero(counts[inverse.reshape(-1)] == 1)[0]
+    if len(boundary):
+        starts = vertices[directed[boundary, 0]]
+        edges = vertices[directed[boundary, 1]] - starts
+        lengths = np.linalg.norm(edges, axis=1)
+        walls = np.cross(edges, normals[boundary // 3])
+        walls /= np.maximum(np.linalg.norm(walls, axis=1), 1e-12)[:, None]
+        planes = np.hstack([walls, -(walls * starts).sum(axis=1)[:, None]])
+        wall_quadrics = (planes[:, :, None] * planes[:, None, :]
+                         * (BOUNDARY_WEIGHT * lengths ** 2)[:, None, None])
+        for end in range(2):
+            np.add.at(quadrics, directed[boundary, end], wall_quadrics)
+    return quadrics
+
+
+class ProgressiveMesh:
+    """A mesh in collapse order plus its recorded collapse sequence"""
+
+    def __init__(self, vertices, faces, parents, faces_after):
+        self.vertices = vertices
+        self.faces = faces
+        self.parents = parents
+        self.faces_after = faces_after
+
+    @property
+    def collapse_count(self):
+        return len(self.faces_after)
+
+    @property
+    def min_face_count(self):
+        """Face count with every recorded collapse applied"""
+        return int(self.faces_after[-1]) if self.collapse_count else len(self.faces)
+
+    @classmethod
+    def build(cls, vertices, faces):
+        """Simplify a mesh as far as it will go (MIN_FACES), recording each collapse"""
+        vertices = np.asarray(vertices, dtype=np.float64)
+        faces = np.asarray(faces, dtype=np.int64)
+        quadrics = vertex_quadrics(vertices, faces)
+        points = np.hstack([vertices, np.ones((len(vertices), 1))])
+
+        face_list = faces.tolist()
+        vertex_faces = [set() for _ in range(len(vertices))]
+        for face_index, face in enumerate(face_list):
+            for vertex in face:
+                vertex_faces[vertex].add(face_index)
+
+        def neighbours(vertex):
+            found = set()
+            for face_index in vertex_faces[vertex]:
+                found.update(face_list[face_index])
+            found.discard(vertex)
+            return found
+
+        positions = vertices.tolist()
+
+        def normal(a, b, c):
+            ux, uy, uz = b[0] - a[0], b[1] - a[1], b[2] - a[2]
+            vx, vy, vz = c[0] - a[0], c[1] - a[1], c[2] - a[2]
+            return uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+
+        def folds(source, target, moved):
+            # Would moving source onto target turn any remaining face over?
+            # (plain Python: a handful of faces, too few for numpy to pay off)
+            for face_index in moved:
+                corners = [positions[vertex] for vertex in face_list[face_index]]
+                old = normal(*corners)
+                corners[face_list[face_index].index(source)] = positions[target]
+                new = normal(*corners)
+                dot = old[0] * new[0] + old[1] * new[1] + old[2] * new[2]
+                lengths = math.sqrt((old[0] ** 2 + old[1] ** 2 + old[2] ** 2)
+                                    * (new[0] ** 2 + new[1] ** 2 + new[2] ** 2))
+                if dot < MIN_NORMAL_DOT * lengths:
+                    return True
+            return False
+
+        # One entry per edge, for its cheaper direction; the other is only
+        # queued if that one folds a face. Entries carry the versions of
+        # both quadrics: a collapse bumps its target's version and queues
+        # fresh entries for the target's edges, so older ones are skipped
+        edges = np.unique(np.sort(faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1), axis=0)
+        merged = quadrics[edges[:, 0]] + quadrics[edges[:, 1]]
+        into = np.einsum('ni,nij,nj->n', points[edges[:, 1]], merged, points[edges[:, 1]])
+        out = np.einsum('ni,nij,nj->n', points[edges[:, 0]], merged, points[edges[:, 0]])
+        heap = [(a_to_b, a, b, 0, 0, b_to_a) if a_to_b <= b_to_a else (b_to_a, b, a, 0, 0, a_to_b)
+                for a, b, a_to_b, b_to_a in zip(edges[:, 0].tolist(), edges[:, 1].tolist(),
+                                                 into.tolist(), out.tolist())]
+        heapq.heapify(heap)
+
+        versions = [0] * len(vertices)
+        removed = [False] * len(vertices)
+        parents = list(range(len(vertices)))
+        order = []
+        faces_after = []
+        face_count = len(face_list)
+
+        while heap:
+            _, source, target, source_version, target_version, reverse = heapq.heappop(heap)
+            if (removed[source] or removed[target] or versions[source] != source_version
+                    or versions[target] != target_version):
+                continue
+            shared = vertex_faces[source] & vertex_faces[target]
+            if not shared or face_count - len(shared) < MIN_FACES:
+                continue
+
+            opposite = set()
+            for face_index in shared:
+                opposite.update(face_list[face_index])
+            opposite -= {source, target}
+            if neighbours(source) & neighbours(target) != opposite:
+                continue
+            moved = vertex_faces[source] - shared
+            if moved and folds(source, target, moved):
+                if reverse is not None:
+                    heapq.heappush(heap, (reverse, target, source, target_version,
+                                          source_version, None))
+                continue
+
+            for face_index in shared:
+                for vertex in face_list[face_index]:
+                    vertex_faces[vertex].discard(face_index)
+            for face_index in moved:
+                face = face_list[face_index]
+                face[face.index(source)] = target
+                vertex_faces[target].add(face_index)
+            vertex_faces[source].clear()
+            quadrics[target] += quadrics[source]
+            versions[target] += 1
+            face_count -= len(shared)
+
+            removed[source] = True
+            parents[source] = target
+            order.append(source)
+            faces_after.append(face_count)
+
+            around = list(neighbours(target))
+            merged = quadrics[around] + quadrics[target]
+            inward = np.einsum('j,njk,k->n', points[target], merged, points[target])
+            outward = np.einsum('nj,njk,nk->n', points[around], merged, points[around])
+            version = versions[target]
+            for vertex, into, out in zip(around, inward.tolist(), outward.tolist()):
+                if into <= out:
+                    heapq.heappush(heap, (into, vertex, target, versions[vertex], version, out))
+                else:
+                    heapq.heappush(heap, (out, target, vertex, version, versions[vertex], into))
+
+        # Survivors first, then removed vertices, last-removed first
+        sequence = np.array([v for v in range(len(vertices)) if not removed[v]] + order[::-1],
+                            dtype=np.int64)
+        position = np.empty_like(sequence)
+        position[sequence] = np.arange(len(sequence))
+        return cls(
+            vertices[sequence],
+            position[faces],
+            position[np.array(parents, dtype=np.int64)[sequence]],
+            np.array(faces_after, dtype=np.int64)
+        )
+
+    def collapses_for(self, face_count):
+        """Fewest collapses that bring the mesh down to at most face_count faces.
+
+        Stops at the end of the sequence if the target is below min_face_count.
+        """
+        if face_count >= len(self.faces):
+            return 0
+        reached = np.nonzero(self.faces_after <= face_count)[0]
+        return int(reached[0]) + 1 if len(reached) else self.collapse_count
+
+    def extract(self, face_count=None, collapses=None):
+        """Replay the sequence to an LOD; returns compact (vertices, faces).
+
+        Give either a target face_count or a number of collapses.
+        """
+        if collapses is None:
+            collapses = self.collapses_for(face_count)
+        keep = len(self.vertices) - collapses
+        representative = np.arange(len(self.vertices))
+        representative[keep:] = self.parents[keep:]
+        while True:
+            jumped = representative[representative]
+            if np.array_equal(jumped, representative):
+                break
+            representative = jumped
+
+        faces = representative[self.faces]
+        faces = faces[(faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2])
+                      & (faces[:, 2] != faces[:, 0])]
+        used, remapped = np.unique(faces, return_inverse=True)
+        return self.vertices[used], remapped.reshape(-1, 3)
+
+    def write(self, path):
+        """Write the progressive mesh to a binary file; returns its size in bytes"""
+        data = b''.join([
+            struct.pack(HEADER_FORMAT, MAGIC, VERSION, 0,
+                        len(self.vertices), len(self.faces), self.collapse_count),
+            self.vertices.astype('<f4').tobytes(),
+            self.faces.astype('<u4').tobytes(),
+            self.parents.astype('<u4').tobytes(),
+            self.faces_after.astype('<u4').tobytes()
+        ])
+        with open(path, 'wb') as f:
+            f.write(data)
+        return len(data)
+
+    @classmethod
+    def read(cls, path):
+        """Load a progressive mesh written by write()"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, _, vertex_count, face_count, collapse_count = struct.unpack_from(
+            HEADER_FORMAT, data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a progressive mesh file")
+        if version != VERSION:
+            raise ValueError(f"{path}: unsupported progressive mesh version {version}")
+
+        offset = HEADER_SIZE
+        sections = []
+        for dtype, count, width in (('<f4', vertex_count, 3), ('<u4', face_count, 3),
+                                    ('<u4', vertex_count, 1), ('<u4', collapse_count, 1)):
+            array = np.frombuffer(data, dtype=dtype, count=count * width, offset=offset)
+            offset += array.nbytes
+            sections.append(array.reshape(-1, 3) if width == 3 else array)
+        vertices, faces, parents, faces_after = sections
+        return cls(vertices.astype(np.float64), faces.astype(np.int64),
+                   parents.astype(np.int64), faces_after.astype(np.int64))
+
+
+def write_obj(path, vertices, faces):
+    """Write a bare OBJ (positions and triangles only)"""
+    with open(path, 'w') as f:
+        f.writelines(f"v {x:.6f} {y:.6f} {z:.6f}\n" for x, y, z in vertices.tolist())
+        f.writelines(f"f {a + 1} {b + 1} {c + 1}\n" for a, b, c in faces.tolist())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or extract from a progressive mesh')
+    parser.add_argument('--input', required=True, help='Progressive mesh file (from generate_lod.py)')
+    parser.add_argument('--ratio', type=float, help='Face ratio to extract (0-1)')
+    parser.add_argument('--output', help='OBJ file for the extracted LOD')
+
+    args = parser.parse_args()
+
+    try:
+        mesh = ProgressiveMesh.read(args.input)
+    except (OSError, ValueError, struct.error) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print(f"{args.input}: {len(mesh.vertices)} vertices, {len(mesh.faces)} faces, "
+          f"{mesh.collapse_count} collapses (down to {mesh.min_face_count} faces)")
+
+    if args.ratio is not None:
+        vertices, faces = mesh.extract(int(len(mesh.faces) * args.ratio))
+        print(f"Ratio {args.ratio}: {len(faces)} faces, {len(vertices)} vertices")
+        if args.output:
+            write_obj(args.output, vertices, faces)
+            print(f"  Saved: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
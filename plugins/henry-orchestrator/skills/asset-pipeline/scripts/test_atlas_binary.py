@@ -0,0 +1,70 @@
+"""Tests for atlas_binary.py (run with pytest)."""
+
+import atlas_binary
+from atlas_binary import AtlasReader
+
+# Distinct names with the same 32-bit FNV-1a hash
+COLLIDING_NAMES = ("sprite_33946", "sprite_779820")
+
+
+def make_frame(x, y, w, h, page=0, rotated=False, pivot=None):
+    frame = {
+        'frame': {'x': x, 'y': y, 'w': w, 'h': h},
+        'page': page,
+        'rotated': rotated,
+        'trimmed': True,
+        'spriteSourceSize': {'x': 3, 'y': 4, 'w': w, 'h': h},
+        'sourceSize': {'w': w + 6, 'h': h + 8},
+    }
+    if pivot is not None:
+        frame['pivot'] = pivot
+    return frame
+
+
+def round_trip(tmp_path, metadata):
+    path = tmp_path / "atlas.bin"
+    atlas_binary.write(metadata, path)
+    return AtlasReader(path)
+
+
+def test_round_trip_rotated_and_multi_page_frames(tmp_path):
+    metadata = {
+        'meta': {'size': {'w': 256, 'h': 256}, 'pages': [{'image': 'a.png'}, {'image': 'a-1.png'}]},
+        'frames': {
+            'hero_idle_01': make_frame(0, 0, 20, 30),
+            'hero_run_01': make_frame(20, 0, 30, 20, rotated=True, pivot={'x': 0.3, 'y': 1.0}),
+            'coin': make_frame(5, 7, 8, 8, page=1),
+            'héros': make_frame(100, 200, 16, 16, page=1, rotated=True),
+        },
+    }
+    with round_trip(tmp_path, metadata) as reader:
+        assert atlas_binary.compare(reader, metadata) == []
+        assert list(reader) == list(metadata['frames'])
+        assert reader['hero_run_01']['rotated'] is True
+        assert reader['coin']['page'] == 1
+        assert reader['hero_run_01']['pivot'] == {'x': 0.3, 'y': 1.0}
+        assert 'missing' not in reader
+        assert reader.to_metadata()['frames']['héros']['frame'] == {'x': 100, 'y': 200, 'w': 16, 'h': 16}
+
+
+def test_name_hash_collisions_resolve_by_name(tmp_path):
+    assert atlas_binary.name_hash(COLLIDING_NAMES[0]) == atlas_binary.name_hash(COLLIDING_NAMES[1])
+    frames = {name: make_frame(i * 10, 0, 10, 10) for i, name in enumerate(COLLIDING_NAMES)}
+    # Plenty of other frames so slot collisions happen too
+    frames.update({f'tile_{i}': make_frame(i % 200, i // 200, 1, 1, page=i % 3) for i in range(500)})
+    metadata = {'meta': {}, 'frames': frames}
+    with round_trip(tmp_path, metadata) as reader:
+        assert atlas_binary.compare(reader, metadata) == []
+        assert reader[COLLIDING_NAMES[0]]['frame']['x'] == 0
+        assert reader[COLLIDING_NAMES[1]]['frame']['x'] == 10
+        assert 'sprite_0' not in reader
+
+
+def test_compare_reports_differences(tmp_path):
+    metadata = {'meta': {}, 'frames': {'a': make_frame(0, 0, 4, 4)}}
+    with round_trip(tmp_path, metadata) as reader:
+        changed = {'meta': {'x': 1}, 'frames': {'a': make_frame(1, 0, 4, 4), 'b': make_frame(0, 0, 1, 1)}}
+        problems = atlas_binary.compare(reader, changed)
+    assert problems[0] == "meta block differs"
+    assert any(problem.startswith("a: ") for problem in problems)
+    assert "b: missing" in problems
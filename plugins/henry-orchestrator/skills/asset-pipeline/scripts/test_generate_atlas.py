@@ -0,0 +1,79 @@
+"""Tests for generate_atlas.py (run with pytest)."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+# Hide numpy the way numpy_backend does when it is not installed, then run
+# generate_atlas.py as a script
+RUN_WITHOUT_NUMPY = """
+import runpy, sys
+sys.path.insert(0, sys.argv[1])
+import numpy_backend
+numpy_backend.np = None
+numpy_backend.HAVE_NUMPY = False
+sys.argv = sys.argv[1:]
+sys.argv[0] = sys.argv[0] + '/generate_atlas.py'
+runpy.run_path(sys.argv[0], run_name='__main__')
+"""
+
+
+def write_sprites(tmp_path):
+    sprites = tmp_path / "sprites"
+    sprites.mkdir()
+    for i, color in enumerate([(255, 0, 0, 255), (0, 255, 0, 255), (0, 0, 255, 255)]):
+        image = Image.new("RGBA", (32, 32), (0, 0, 0, 0))
+        image.paste(color, (4 + i, 6, 20 + i, 24))
+        image.save(sprites / f"sprite{i}.png")
+    return sprites
+
+
+def run_atlas(*args):
+    result = subprocess.run(
+        [sys.executable, str(SCRIPTS_DIR / "generate_atlas.py"), *map(str, args)],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result.stdout
+
+
+def test_generate_atlas_runs_without_numpy(tmp_path):
+    sprites = write_sprites(tmp_path)
+    output = tmp_path / "atlas.png"
+    result = subprocess.run(
+        [sys.executable, "-c", RUN_WITHOUT_NUMPY, str(SCRIPTS_DIR),
+         "--input", str(sprites), "--output", str(output)],
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    frames = json.loads(output.with_suffix(".json").read_text())["frames"]
+    assert sorted(frames) == ["sprite0", "sprite1", "sprite2"]
+    assert frames["sprite1"]["spriteSourceSize"] == {"x": 5, "y": 6, "w": 16, "h": 18}
+
+
+def test_cached_build_writes_newly_requested_outputs(tmp_path):
+    sprites = write_sprites(tmp_path)
+    output = tmp_path / "atlas.png"
+    run_atlas("--input", sprites, "--output", output)
+    assert "up to date" in run_atlas("--input", sprites, "--output", output)
+
+    run_atlas("--input", sprites, "--output", output, "--binary-metadata")
+    assert output.with_suffix(".bin").exists()
+
+
+def test_stale_pages_are_removed(tmp_path):
+    sprites = write_sprites(tmp_path)
+    output = tmp_path / "atlas.png"
+    run_atlas("--input", sprites, "--output", output, "--size", "32", "--max-pages", "4")
+    assert (tmp_path / "atlas-1.png").exists()
+
+    run_atlas("--input", sprites, "--output", output, "--size", "128")
+    assert sorted(path.name for path in tmp_path.glob("atlas*.png")) == ["atlas.png"]
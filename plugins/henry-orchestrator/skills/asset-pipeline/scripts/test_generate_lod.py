@@ -0,0 +1,48 @@
+"""Tests for generate_lod.py (run with pytest)."""
+
+import json
+import os
+
+import trimesh
+
+import generate_lod
+from generate_lod import BatchLODGenerator
+
+ORIGINAL_GENERATE_MODEL = generate_lod.generate_model
+
+
+def crashing_generate_model(config, input_path, *args):
+    """Batch worker that dies outright on models named *crash*"""
+    if 'crash' in str(input_path):
+        os._exit(1)
+    return ORIGINAL_GENERATE_MODEL(config, input_path, *args)
+
+
+def write_models(directory, names):
+    directory.mkdir()
+    for name in names:
+        trimesh.creation.icosphere(subdivisions=2).export(directory / name)
+
+
+def test_batch_survives_a_dying_worker(tmp_path, monkeypatch):
+    models = tmp_path / "models"
+    output = tmp_path / "lods"
+    write_models(models, ["a.obj", "b_crash.obj", "c.obj"])
+    monkeypatch.setattr(generate_lod, "generate_model", crashing_generate_model)
+
+    batch = BatchLODGenerator({}, 2, [1.0, 0.5], workers=1)
+    batch.run(models, output)
+    assert "a.obj" in batch.models
+    assert "b_crash.obj" in batch.failed
+    assert batch.failed["b_crash.obj"].startswith("worker error")
+
+    # Models built before the crash are cached; the rest are retried
+    cache = json.loads((output / BatchLODGenerator.CACHE_FILE).read_text())
+    assert list(cache["models"]) == ["a.obj"]
+    monkeypatch.setattr(generate_lod, "generate_model", ORIGINAL_GENERATE_MODEL)
+    batch = BatchLODGenerator({}, 2, [1.0, 0.5], workers=1)
+    batch.run(models, output)
+    assert batch.models["a.obj"]["cached"]
+    assert not batch.models["c.obj"]["cached"]
+    assert "b_crash.obj" in batch.models
+    assert not batch.failed
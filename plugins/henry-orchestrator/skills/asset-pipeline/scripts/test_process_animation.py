@@ -0,0 +1,35 @@
+"""Tests for process_animation.py (run with pytest)."""
+
+from PIL import Image
+
+from process_animation import AnimationProcessor
+
+
+def write_frames(directory, names):
+    for i, name in enumerate(names):
+        image = Image.new("RGBA", (16, 16), (0, 0, 0, 0))
+        image.paste((255, 10 * i, 0, 255), (2, 2, 10 + i, 12))
+        image.save(directory / name)
+
+
+def test_shared_trailing_number_keeps_every_frame(tmp_path):
+    write_frames(tmp_path, ["anim_10_2x.png", "anim_01_2x.png", "anim_02_2x.png"])
+    processor = AnimationProcessor({})
+    processor.load_frames(tmp_path)
+    assert [frame.name for frame in processor.frames] == ["anim_01_2x", "anim_02_2x", "anim_10_2x"]
+    assert processor.timeline == [0, 1, 2]
+
+
+def test_holds_fill_gaps_in_frame_numbers(tmp_path):
+    write_frames(tmp_path, ["walk_1.png", "walk_4.png", "walk_5.png"])
+    processor = AnimationProcessor({"frame_holds": True})
+    processor.load_frames(tmp_path)
+    assert [frame.number for frame in processor.frames] == [1, 4, 5]
+    assert processor.timeline == [0, 0, 0, 1, 2]
+
+
+def test_frame_range_selects_by_number(tmp_path):
+    write_frames(tmp_path, ["walk_1.png", "walk_2.png", "walk_3.png", "walk_4.png"])
+    processor = AnimationProcessor({"frame_range": [2, 3]})
+    processor.load_frames(tmp_path)
+    assert [frame.number for frame in processor.frames] == [2, 3]
@@ -0,0 +1,51 @@
+"""Tests for progressive_mesh.py (run with pytest)."""
+
+import numpy as np
+
+from progressive_mesh import ProgressiveMesh
+
+
+def bumpy_grid(size=24):
+    """A wavy height-field surface with (size - 1)^2 * 2 faces"""
+    xs, ys = np.meshgrid(np.linspace(0, 1, size), np.linspace(0, 1, size))
+    zs = 0.05 * np.sin(xs * 7) * np.cos(ys * 5)
+    vertices = np.stack([xs.ravel(), ys.ravel(), zs.ravel()], axis=1)
+    faces = []
+    for row in range(size - 1):
+        for col in range(size - 1):
+            a = row * size + col
+            faces.append((a, a + 1, a + size))
+            faces.append((a + 1, a + size + 1, a + size))
+    return vertices, np.array(faces)
+
+
+def test_collapse_sequence_round_trips_through_file(tmp_path):
+    vertices, faces = bumpy_grid()
+    mesh = ProgressiveMesh.build(vertices, faces)
+    assert mesh.collapse_count > 0
+    assert mesh.min_face_count < len(faces) // 4
+
+    path = tmp_path / "model_pm.bin"
+    mesh.write(path)
+    loaded = ProgressiveMesh.read(path)
+    assert np.array_equal(loaded.faces, mesh.faces)
+    assert np.array_equal(loaded.parents, mesh.parents)
+    assert np.array_equal(loaded.faces_after, mesh.faces_after)
+
+    for ratio in (1.0, 0.5, 0.3, 0.1):
+        target = int(len(faces) * ratio)
+        lod_vertices, lod_faces = mesh.extract(target)
+        loaded_vertices, loaded_faces = loaded.extract(target)
+        assert len(lod_faces) <= max(target, mesh.min_face_count)
+        assert np.array_equal(loaded_faces, lod_faces)
+        assert np.allclose(loaded_vertices, lod_vertices, atol=1e-6)
+
+
+def test_replay_matches_face_counts_recorded_per_collapse():
+    vertices, faces = bumpy_grid(12)
+    mesh = ProgressiveMesh.build(vertices, faces)
+    for collapses in (1, mesh.collapse_count // 2, mesh.collapse_count):
+        _, lod_faces = mesh.extract(collapses=collapses)
+        assert len(lod_faces) == mesh.faces_after[collapses - 1]
+    _, full_faces = mesh.extract(collapses=0)
+    assert len(full_faces) == len(faces)
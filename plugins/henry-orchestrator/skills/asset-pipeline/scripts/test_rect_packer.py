@@ -0,0 +1,58 @@
+"""Tests for rect_packer.py (run with pytest)."""
+
+import random
+
+import rect_packer
+from rect_packer import MaxRectsBin
+
+
+def random_rects(count, seed=1):
+    rng = random.Random(seed)
+    return [(rng.randint(4, 120), rng.randint(4, 120), object()) for _ in range(count)]
+
+
+def assert_valid(result, rects):
+    placed = {}
+    for page, x, y, w, h, rid in result.rects:
+        page_w, page_h = result.page_sizes[page]
+        assert 0 <= x and 0 <= y and x + w <= page_w and y + h <= page_h
+        placed.setdefault(page, []).append((x, y, w, h))
+    for boxes in placed.values():
+        boxes.sort()
+        for i, (x, y, w, h) in enumerate(boxes):
+            for ox, oy, ow, oh in boxes[i + 1:]:
+                if ox >= x + w:
+                    break
+                assert oy >= y + h or oy + oh <= y
+    assert len(result.rects) + len(result.unpacked) == len(rects)
+
+
+def test_maxrects_free_list_stays_maximal():
+    for rotation in (False, True):
+        bin_ = MaxRectsBin(512, 512, 'best_area_fit', rotation)
+        for w, h, _ in random_rects(300):
+            bin_.insert(w, h)
+            for i, rect in enumerate(bin_.free):
+                assert not any(
+                    rect_packer._contains(other, rect)
+                    for j, other in enumerate(bin_.free) if j != i
+                )
+
+
+def test_every_strategy_packs_without_overlap():
+    rects = random_rects(400)
+    for strategy in rect_packer.strategies(mode='exhaustive'):
+        algorithm, heuristic, sort = strategy
+        result = rect_packer.pack(rects, 512, 512, algorithm, heuristic, sort, rotation=True)
+        assert_valid(result, rects)
+        assert not result.unpacked
+
+
+def test_parallel_exhaustive_matches_serial():
+    rects = random_rects(300)
+    serial = rect_packer.pack(rects, 512, 512, mode='exhaustive', max_pages=3)
+    parallel = rect_packer.pack(rects, 512, 512, mode='exhaustive', max_pages=3, workers=2)
+    assert parallel.strategy == serial.strategy
+    assert parallel.rects == serial.rects
+    assert parallel.unpacked == serial.unpacked
+    assert_valid(parallel, rects)
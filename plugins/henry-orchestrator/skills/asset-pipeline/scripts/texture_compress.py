@@ -0,0 +1,720 @@
+#!/usr/bin/env python3
+"""
+Texture Compression
+
+Encodes atlas pages into GPU block-compressed formats and writes them, with
+a mip chain, to KTX2 or DDS containers that can be uploaded without
+decoding at runtime.
+
+Formats:
+- bc1, bc3: NumPy reference encoder (PCA endpoints, nearest-palette
+  indices; bc1 uses punch-through alpha for transparent pixels)
+- etc2_rgb, etc2_rgba: NumPy reference encoder (ETC1-compatible
+  individual/differential blocks, which are valid ETC2; EAC alpha for
+  etc2_rgba)
+- bc7: compressonatorcli, if installed
+- astc_4x4, astc_6x6, astc_8x8: astcenc, if installed
+
+Mip chains use a box or Kaiser filter (see mip_chain).
+
+The reference encoders favour speed and portability over quality; point
+the pipeline at a local encoder binary for production-quality BC7/ASTC.
+Each mip level is split into bands of block rows that are encoded on a
+thread pool.
+
+Requirements:
+    pip install Pillow numpy
+    astcenc, compressonatorcli  # optional, for astc_* and bc7
+
+Usage:
+    python texture_compress.py --input atlas.png --format bc3
+    python texture_compress.py --input atlas.png --format etc2_rgba --container ktx2 --no-mipmaps
+"""
+
+import argparse
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from PIL import Image
+
+import numpy_backend
+
+np = numpy_backend.np
+
+# Vulkan/DXGI format codes and KTX2 data format descriptor (DFD) fields:
+# color model and the (channel, bit offset, bit length) of each sample.
+FORMATS = {
+    'bc1': {
+        'block': (4, 4), 'bytes': 8, 'encoder': 'numpy',
+        'vk_format': 133, 'dds_fourcc': b'DXT1',
+        'dfd_model': 128, 'dfd_samples': [(1, 0, 64)],
+    },
+    'bc3': {
+        'block': (4, 4), 'bytes': 16, 'encoder': 'numpy',
+        'vk_format': 137, 'dds_fourcc': b'DXT5',
+        'dfd_model': 130, 'dfd_samples': [(15, 0, 64), (0, 64, 64)],
+    },
+    'bc7': {
+        'block': (4, 4), 'bytes': 16, 'encoder': 'compressonator',
+        'vk_format': 145, 'dxgi_format': 98,
+        'dfd_model': 134, 'dfd_samples': [(0, 0, 128)],
+    },
+    'etc2_rgb': {
+        'block': (4, 4), 'bytes': 8, 'encoder': 'numpy',
+        'vk_format': 147,
+        'dfd_model': 161, 'dfd_samples': [(2, 0, 64)],
+    },
+    'etc2_rgba': {
+        'block': (4, 4), 'bytes': 16, 'encoder': 'numpy',
+        'vk_format': 151,
+        'dfd_model': 161, 'dfd_samples': [(15, 0, 64), (2, 64, 64)],
+    },
+    'astc_4x4': {
+        'block': (4, 4), 'bytes': 16, 'encoder': 'astcenc',
+        'vk_format': 157,
+        'dfd_model': 162, 'dfd_samples': [(0, 0, 128)],
+    },
+    'astc_6x6': {
+        'block': (6, 6), 'bytes': 16, 'encoder': 'astcenc',
+        'vk_format': 165,
+        'dfd_model': 162, 'dfd_samples': [(0, 0, 128)],
+    },
+    'astc_8x8': {
+        'block': (8, 8), 'bytes': 16, 'encoder': 'astcenc',
+        'vk_format': 171,
+        'dfd_model': 162, 'dfd_samples': [(0, 0, 128)],
+    },
+}
+
+# Names used by the example configs (compression.format_*)
+FORMAT_ALIASES = {
+    'dxt1': 'bc1',
+    'dxt5': 'bc3',
+    'etc2': 'etc2_rgba',
+}
+
+ASTCENC_BINARIES = ('astcenc', 'astcenc-avx2', 'astcenc-sse4.1', 'astcenc-sse2', 'astcenc-neon')
+COMPRESSONATOR_BINARIES = ('compressonatorcli', 'CompressonatorCLI')
+
+KTX2_IDENTIFIER = b'\xabKTX 20\xbb\r\n\x1a\n'
+
+# ETC1 modifier tables (a, b); pixel index 0..3 selects +a, +b, -a, -b
+ETC_TABLES = [(2, 8), (5, 17), (9, 29), (13, 42), (18, 60), (24, 80), (33, 106), (47, 183)]
+
+EAC_TABLES = [
+    (-3, -6, -9, -15, 2, 5, 8, 14), (-3, -7, -10, -13, 2, 6, 9, 12),
+    (-2, -5, -8, -13, 1, 4, 7, 12), (-2, -4, -6, -13, 1, 3, 5, 12),
+    (-3, -6, -8, -12, 2, 5, 7, 11), (-3, -7, -9, -11, 2, 6, 8, 10),
+    (-4, -7, -8, -11, 3, 6, 7, 10), (-3, -5, -8, -11, 2, 4, 7, 10),
+    (-2, -6, -8, -10, 1, 5, 7, 9), (-2, -5, -8, -10, 1, 4, 7, 9),
+    (-2, -4, -8, -10, 1, 3, 7, 9), (-2, -5, -7, -10, 1, 4, 6, 9),
+    (-3, -4, -7, -10, 2, 3, 6, 9), (-1, -2, -3, -10, 0, 1, 2, 9),
+    (-4, -6, -8, -9, 3, 5, 7, 8), (-3, -5, -7, -9, 2, 4, 6, 8),
+]
+
+
+def resolve_format(name):
+    """Map a format name or config alias to a FORMATS key, or None"""
+    key = name.lower().replace('-', '_')
+    key = FORMAT_ALIASES.get(key, key)
+    return key if key in FORMATS else None
+
+
+def find_encoder(fmt):
+    """Return the encoder binary for an external format, or None"""
+    encoder = FORMATS[fmt]['encoder']
+    if encoder == 'numpy':
+        return None
+    names = ASTCENC_BINARIES if encoder == 'astcenc' else COMPRESSONATOR_BINARIES
+    for name in names:
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+def is_available(fmt):
+    """True if fmt can be encoded here (NumPy installed or binary found)"""
+    if FORMATS[fmt]['encoder'] == 'numpy':
+        return numpy_backend.HAVE_NUMPY
+    return find_encoder(fmt) is not None
+
+
+# Kaiser-windowed sinc downsampling: 4 taps at source offsets -1..2
+KAISER_ALPHA = 4.0
+MIP_FILTERS = ('box', 'kaiser')
+
+
+def _filter_taps(filter):
+    """Return (source offsets, weights) of a 2:1 downsampling filter"""
+    if filter == 'kaiser':
+        distance = np.array([-1.5, -0.5, 0.5, 1.5])
+        window = np.i0(KAISER_ALPHA * np.sqrt(1 - (distance / 2) ** 2)) / np.i0(KAISER_ALPHA)
+        weights = np.sinc(distance / 2) * window
+        return (-1, 0, 1, 2), weights / weights.sum()
+    return (0, 1), np.array([0.5, 0.5])
+
+
+def filter_radius(filter):
+    """Source texels a filter reaches beyond the 2x2 box, per side"""
+    offsets, _ = _filter_taps(filter)
+    return -offsets[0]
+
+
+def _downsample_axis(array, axis, offsets, reduce):
+    """Halve one axis, combining the source rows at 2i + offset.
+
+    reduce is either a weights array (filtering) or np.minimum /
+    np.maximum (owner tracking). Source indices are clamped to the edge.
+    """
+    size = array.shape[axis]
+    if size == 1:
+        return array
+    base = np.arange(size // 2) * 2
+    taps = [np.take(array, np.clip(base + offset, 0, size - 1), axis=axis) for offset in offsets]
+    if isinstance(reduce, np.ndarray):
+        return sum(weight * tap for weight, tap in zip(reduce, taps))
+    result = taps[0]
+    for tap in taps[1:]:
+        result = reduce(result, tap)
+    return result
+
+
+def mip_chain(pixels, levels=None, filter='box', owners=None):
+    """Return [level 0, level 1, ...] uint8 RGBA arrays down to 1x1.
+
+    Each level is a separable 2:1 box or Kaiser filter of the previous
+    one. levels limits the chain length (mip levels below the base).
+
+    With an owners array (int32 per pixel, e.g. the sprite index of each
+    atlas cell, -1 for empty), also tracks the lowest and highest owner
+    contributing to every texel through the same filter footprint, and
+    returns (chain, [(owner_min, owner_max), ...]). A texel whose min and
+    max differ mixes pixels from different owners.
+    """
+    offsets, weights = _filter_taps(filter)
+    chain = [pixels]
+    bounds = [(owners, owners)] if owners is not None else None
+    current = pixels.astype(np.float32)
+    while current.shape[0] > 1 or current.shape[1] > 1:
+        if levels is not None and len(chain) > levels:
+            break
+        for axis in (0, 1):
+            current = _downsample_axis(current, axis, offsets, weights)
+        current = np.clip(np.floor(current + 0.5), 0, 255)
+        chain.append(current.astype(np.uint8))
+        if bounds is not None:
+            low, high = bounds[-1]
+            for axis in (0, 1):
+                low = _downsample_axis(low, axis, offsets, np.minimum)
+                high = _downsample_axis(high, axis, offsets, np.maximum)
+            bounds.append((low, high))
+    if bounds is not None:
+        return chain, bounds
+    return chain
+
+
+def _to_blocks(pixels, block_w, block_h):
+    """Split an RGBA array into (rows, cols, block_h * block_w, 4) blocks.
+
+    Partial blocks at the right/bottom edge are padded by repeating the
+    last row/column.
+    """
+    height, width = pixels.shape[:2]
+    rows = -(-height // block_h)
+    cols = -(-width // block_w)
+    padded = np.pad(pixels, ((0, rows * block_h - height), (0, cols * block_w - width), (0, 0)),
+                    mode='edge')
+    blocks = padded.reshape(rows, block_h, cols, block_w, 4).swapaxes(1, 2)
+    return blocks.reshape(rows, cols, block_h * block_w, 4)
+
+
+def _pack_565(colors):
+    """Quantize float RGB (..., 3) to RGB565 codes"""
+    scale = np.array([31, 63, 31]) / 255.0
+    q = np.clip(np.rint(colors * scale), 0, [31, 63, 31]).astype(np.uint32)
+    return (q[..., 0] << 11) | (q[..., 1] << 5) | q[..., 2]
+
+
+def _unpack_565(codes):
+    """Expand RGB565 codes to 8-bit RGB (..., 3)"""
+    r = (codes >> 11) & 31
+    g = (codes >> 5) & 63
+    b = codes & 31
+    return np.stack([(r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)],
+                    axis=-1).astype(np.float32)
+
+
+def _pca_endpoints(colors, weights):
+    """Endpoints of the principal axis of weighted RGB colors per block.
+
+    colors: (N, 16, 3) float, weights: (N, 16). Returns two (N, 3) arrays.
+    """
+    total = np.maximum(weights.sum(axis=1, keepdims=True), 1e-6)
+    mean = (colors * weights[..., None]).sum(axis=1) / total
+    centered = (colors - mean[:, None]) * weights[..., None]
+    cov = np.einsum('nki,nkj->nij', centered, centered)
+    axis = np.ones((len(colors), 3), dtype=np.float64)
+    for _ in range(6):
+        axis = np.einsum('nij,nj->ni', cov, axis)
+        axis /= np.maximum(np.abs(axis).max(axis=1, keepdims=True), 1e-6)
+    axis /= np.maximum(np.linalg.norm(axis, axis=1, keepdims=True), 1e-6)
+    projection = np.einsum('nki,ni->nk', colors - mean[:, None], axis)
+    # Ignore zero-weight pixels when taking the extent along the axis
+    lo = np.where(weights > 0, projection, np.inf).min(axis=1)
+    hi = np.where(weights > 0, projection, -np.inf).max(axis=1)
+    lo = np.where(np.isfinite(lo), lo, 0)
+    hi = np.where(np.isfinite(hi), hi, 0)
+    return mean + axis * hi[:, None], mean + axis * lo[:, None]
+
+
+def _encode_bc1_color(blocks, punch_through):
+    """Encode (N, 16, 4) blocks into BC1 color blocks: (N, 8) uint8.
+
+    With punch_through, blocks containing pixels with alpha < 128 use the
+    3-color mode and index 3 (transparent black) for those pixels.
+    """
+    colors = blocks[..., :3].astype(np.float32)
+    alpha = blocks[..., 3]
+    transparent = alpha < 128 if punch_through else np.zeros(alpha.shape, dtype=bool)
+    three_color = transparent.any(axis=1)
+    weights = (alpha > 0).astype(np.float32)
+    if punch_through:
+        weights = (~transparent).astype(np.float32)
+
+    hi, lo = _pca_endpoints(colors, weights)
+    c0 = _pack_565(hi)
+    c1 = _pack_565(lo)
+
+    # 4-color mode needs c0 > c1, 3-color mode c0 <= c1
+    swap = np.where(three_color, c0 > c1, c0 < c1)
+    c0, c1 = np.where(swap, c1, c0), np.where(swap, c0, c1)
+
+    p0 = _unpack_565(c0)
+    p1 = _unpack_565(c1)
+    palette4 = np.stack([p0, p1, (2 * p0 + p1) / 3, (p0 + 2 * p1) / 3], axis=1)
+    palette3 = np.stack([p0, p1, (p0 + p1) / 2, np.full_like(p0, 1e9)], axis=1)
+    palette = np.where(three_color[:, None, None], palette3, palette4)
+
+    distance = ((colors[:, :, None, :] - palette[:, None, :, :]) ** 2).sum(axis=-1)
+    indices = distance.argmin(axis=2).astype(np.uint32)
+    indices[transparent] = 3
+    indices[(c0 == c1) & ~three_color] = 0
+
+    shifts = (np.arange(16, dtype=np.uint32) * 2)
+    bits = (indices << shifts).sum(axis=1, dtype=np.uint64).astype(np.uint32)
+
+    out = np.empty((len(blocks), 8), dtype=np.uint8)
+    out[:, 0:2] = c0.astype('<u2').view(np.uint8).reshape(-1, 2)
+    out[:, 2:4] = c1.astype('<u2').view(np.uint8).reshape(-1, 2)
+    out[:, 4:8] = bits.astype('<u4').view(np.uint8).reshape(-1, 4)
+    return out
+
+
+def _encode_bc3_alpha(blocks):
+    """Encode the alpha of (N, 16, 4) blocks into BC3 alpha blocks: (N, 8)"""
+    alpha = blocks[..., 3].astype(np.int32)
+    a0 = alpha.max(axis=1)
+    a1 = alpha.min(axis=1)
+    # a0 > a1 selects the 8-value palette: a0, a1, then 6 interpolants
+    palette = np.empty((len(blocks), 8), dtype=np.float32)
+    palette[:, 0] = a0
+    palette[:, 1] = a1
+    for i in range(1, 7):
+        palette[:, i + 1] = ((7 - i) * a0 + i * a1) / 7.0
+    indices = np.abs(alpha[:, :, None] - palette[:, None, :]).argmin(axis=2).astype(np.uint64)
+    indices[a0 == a1] = 0
+
+    shifts = np.arange(16, dtype=np.uint64) * 3
+    bits = (indices << shifts).sum(axis=1, dtype=np.uint64)
+
+    out = np.empty((len(blocks), 8), dtype=np.uint8)
+    out[:, 0] = a0
+    out[:, 1] = a1
+    out[:, 2:8] = bits.astype('<u8').view(np.uint8).reshape(-1, 8)[:, :6]
+    return out
+
+
+def encode_bc1(blocks):
+    """Encode (N, 16, 4) RGBA blocks as BC1 with punch-through alpha"""
+    return _encode_bc1_color(blocks, punch_through=True)
+
+
+def encode_bc3(blocks):
+    """Encode (N, 16, 4) RGBA blocks as BC3 (BC3 alpha + BC1 color)"""
+    return np.concatenate([_encode_bc3_alpha(blocks),
+                           _encode_bc1_color(blocks, punch_through=False)], axis=1)
+
+
+# ETC pixel order is column-major: pixel (x, y) is index x * 4 + y, while
+# blocks from _to_blocks are row-major (y * 4 + x). Plain lists (used as
+# fancy indices) keep the module importable without numpy.
+_ETC_ORDER = [y * 4 + x for x in range(4) for y in range(4)]
+
+# Row-major pixel indices of the two sub-blocks for flip = 0 (2x4 side by
+# side) and flip = 1 (4x2 stacked)
+_ETC_SUBBLOCKS = [
+    ([y * 4 + x for y in range(4) for x in (0, 1)],
+     [y * 4 + x for y in range(4) for x in (2, 3)]),
+    ([y * 4 + x for y in (0, 1) for x in range(4)],
+     [y * 4 + x for y in (2, 3) for x in range(4)]),
+]
+
+
+def _etc_subblock_fit(pixels, weights, base):
+    """Best modifier table per sub-block for the given base colors.
+
+    pixels: (N, 8, 3), weights: (N, 8), base: (N, 3) expanded 8-bit colors.
+    Returns (error (N,), table (N,), indices (N, 8)).
+    """
+    modifiers = np.array([[a, b, -a, -b] for a, b in ETC_TABLES], dtype=np.float32)
+    # |p - (base + m)|^2 = |p - base|^2 - 2m * sum(p - base) + 3m^2, ignoring
+    # the clamp to 0..255 (which only ever moves a color closer to p)
+    offset = pixels - base[:, None, :]
+    distance = (offset ** 2).sum(axis=-1)[:, :, None, None]
+    total = offset.sum(axis=-1)[:, :, None, None]
+    # (N, 8 pixels, 8 tables, 4 modifiers)
+    error = distance - 2 * modifiers * total + 3 * modifiers ** 2
+    best_modifier = error.argmin(axis=3)
+    table_error = (error.min(axis=3) * weights[:, :, None]).sum(axis=1)
+    table = table_error.argmin(axis=1)
+    rows = np.arange(len(pixels))
+    indices = best_modifier[rows, :, table]
+    return table_error[rows, table], table, indices
+
+
+def encode_etc1(blocks):
+    """Encode (N, 16, 4) RGBA blocks as ETC1/ETC2 RGB blocks: (N, 8) uint8.
+
+    Only the individual and differential modes are used, so the output is
+    valid ETC1 and ETC2 (differential bases never overflow into the ETC2
+    T/H/planar modes).
+    """
+    count = len(blocks)
+    colors = blocks[..., :3].astype(np.float32)
+    weights = (blocks[..., 3] > 0).astype(np.float32)
+    weights[weights.sum(axis=1) == 0] = 1.0
+
+    best_error = np.full(count, np.inf)
+    best_word = np.zeros(count, dtype=np.uint64)
+    for flip, subblocks in enumerate(_ETC_SUBBLOCKS):
+        sub_pixels = [colors[:, idx] for idx in subblocks]
+        sub_weights = [weights[:, idx] for idx in subblocks]
+        averages = []
+        for pixels, w in zip(sub_pixels, sub_weights):
+            total = np.maximum(w.sum(axis=1, keepdims=True), 1e-6)
+            averages.append((pixels * w[..., None]).sum(axis=1) / total)
+
+        # Differential mode: 5-bit base + 3-bit signed delta
+        q5 = [np.clip(np.rint(avg * 31 / 255), 0, 31).astype(np.int64) for avg in averages]
+        delta = q5[1] - q5[0]
+        diff_ok = ((delta >= -4) & (delta <= 3)).all(axis=1)
+        delta = np.clip(delta, -4, 3)
+        q5_second = q5[0] + delta
+        bases5 = [(q << 3) | (q >> 2) for q in (q5[0], q5_second)]
+
+        # Individual mode: two 4-bit bases
+        q4 = [np.clip(np.rint(avg * 15 / 255), 0, 15).astype(np.int64) for avg in averages]
+        bases4 = [(q << 4) | q for q in q4]
+
+        for differential, bases in ((True, bases5), (False, bases4)):
+            fits = [
+                _etc_subblock_fit(pixels, w, base.astype(np.float32))
+                for pixels, w, base in zip(sub_pixels, sub_weights, bases)
+            ]
+            error = fits[0][0] + fits[1][0]
+            if differential:
+                error = np.where(diff_ok, error, np.inf)
+
+            word = np.zeros(count, dtype=np.uint64)
+            if differential:
+                d = (delta & 7).astype(np.uint64)
+                q = q5[0].astype(np.uint64)
+                word |= (q[:, 0] << 59) | (d[:, 0] << 56)
+                word |= (q[:, 1] << 51) | (d[:, 1] << 48)
+                word |= (q[:, 2] << 43) | (d[:, 2] << 40)
+                word |= np.uint64(1) << np.uint64(33)
+            else:
+                a = q4[0].astype(np.uint64)
+                b = q4[1].astype(np.uint64)
+                word |= (a[:, 0] << 60) | (b[:, 0] << 56)
+                word |= (a[:, 1] << 52) | (b[:, 1] << 48)
+                word |= (a[:, 2] << 44) | (b[:, 2] << 40)
+            word |= fits[0][1].astype(np.uint64) << np.uint64(37)
+            word |= fits[1][1].astype(np.uint64) << np.uint64(34)
+            word |= np.uint64(flip) << np.uint64(32)
+
+            # Scatter sub-block indices back to pixel positions
+            indices = np.zeros((count, 16), dtype=np.uint64)
+            indices[:, subblocks[0]] = fits[0][2]
+            indices[:, subblocks[1]] = fits[1][2]
+            indices = indices[:, _ETC_ORDER]
+            positions = np.arange(16, dtype=np.uint64)
+            word |= ((indices & 1) << positions).sum(axis=1, dtype=np.uint64)
+            word |= ((indices >> 1) << (positions + 16)).sum(axis=1, dtype=np.uint64)
+
+            better = error < best_error
+            best_error = np.where(better, error, best_error)
+            best_word = np.where(better, word, best_word)
+
+    return best_word.astype('>u8').view(np.uint8).reshape(-1, 8)
+
+
+def _eac_search(alpha):
+    """Best (base, multiplier, table, indices) for (N, 16) alpha values"""
+    count = len(alpha)
+    lo = alpha.min(axis=1)
+    hi = alpha.max(axis=1)
+    tables = np.array(EAC_TABLES, dtype=np.float32)
+    spans = tables.max(axis=1) - tables.min(axis=1)
+
+    best_error = np.full(count, np.inf)
+    best = None
+    for t, (modifiers, span) in enumerate(zip(tables, spans)):
+        center = (modifiers.max() + modifiers.min()) / 2
+        estimate = np.clip(np.rint((hi - lo) / span), 1, 15)
+        for step in (0, 1):
+            multiplier = np.clip(estimate + step, 1, 15)
+            base = np.clip(np.rint((hi + lo) / 2 - center * multiplier), 0, 255)
+            values = np.clip(base[:, None] + modifiers[None, :] * multiplier[:, None], 0, 255)
+            error = np.abs(alpha[:, :, None] - values[:, None, :])
+            indices = error.argmin(axis=2)
+            total = error.min(axis=2).sum(axis=1)
+            better = total < best_error
+            best_error = np.where(better, total, best_error)
+            if best is None:
+                best = [base, multiplier, np.full(count, t), indices]
+            else:
+                best[0] = np.where(better, base, best[0])
+                best[1] = np.where(better, multiplier, best[1])
+                best[2] = np.where(better, t, best[2])
+                best[3] = np.where(better[:, None], indices, best[3])
+    return best
+
+
+def encode_eac_alpha(blocks):
+    """Encode the alpha of (N, 16, 4) blocks as ETC2 EAC blocks: (N, 8)"""
+    count = len(blocks)
+    alpha = blocks[..., 3].astype(np.float32)[:, _ETC_ORDER]
+
+    # Flat blocks (fully opaque/transparent in most atlases) are exact
+    # with table 13, whose modifier 4 is zero
+    base = alpha[:, 0].copy()
+    multiplier = np.ones(count, dtype=np.float32)
+    table = np.full(count, 13)
+    indices = np.full((count, 16), 4)
+    varying = alpha.min(axis=1) != alpha.max(axis=1)
+    if varying.any():
+        base[varying], multiplier[varying], table[varying], indices[varying] = \
+            _eac_search(alpha[varying])
+
+    word = base.astype(np.uint64) << np.uint64(56)
+    word |= multiplier.astype(np.uint64) << np.uint64(52)
+    word |= table.astype(np.uint64) << np.uint64(48)
+    shifts = np.uint64(45) - np.arange(16, dtype=np.uint64) * np.uint64(3)
+    word |= (indices.astype(np.uint64) << shifts).sum(axis=1, dtype=np.uint64)
+    return word.astype('>u8').view(np.uint8).reshape(-1, 8)
+
+
+def encode_etc2_rgba(blocks):
+    """Encode (N, 16, 4) RGBA blocks as ETC2 RGBA8 (EAC alpha + ETC color)"""
+    return np.concatenate([encode_eac_alpha(blocks), encode_etc1(blocks)], axis=1)
+
+
+NUMPY_ENCODERS = {
+    'bc1': encode_bc1,
+    'bc3': encode_bc3,
+    'etc2_rgb': encode_etc1,
+    'etc2_rgba': encode_etc2_rgba,
+}
+
+
+def _encode_numpy(pixels, fmt, executor):
+    """Encode one level with a reference encoder, in bands of block rows"""
+    block_w, block_h = FORMATS[fmt]['block']
+    blocks = _to_blocks(pixels, block_w, block_h)
+    rows = blocks.shape[0]
+    workers = getattr(executor, '_max_workers', 1)
+    band = max(1, -(-rows // (workers * 4)))
+    encoder = NUMPY_ENCODERS[fmt]
+
+    def encode_band(start):
+        band_blocks = np.ascontiguousarray(blocks[start:start + band]).reshape(-1, block_w * block_h * 4)
+        # Atlases repeat many blocks (transparent gaps, flat fills):
+        # encode each distinct block once
+        keys = band_blocks.view(np.dtype((np.void, band_blocks.shape[1]))).ravel()
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        encoded = encoder(band_blocks[first].reshape(-1, block_w * block_h, 4))
+        return encoded[inverse.ravel()].tobytes()
+
+    return b''.join(executor.map(encode_band, range(0, rows, band)))
+
+
+def _encode_external(pixels, fmt):
+    """Encode one level with astcenc or compressonatorcli"""
+    binary = find_encoder(fmt)
+    if binary is None:
+        raise RuntimeError(f"No encoder found for {fmt}: install "
+                           f"{'astcenc' if FORMATS[fmt]['encoder'] == 'astcenc' else 'compressonatorcli'}")
+    block_w, block_h = FORMATS[fmt]['block']
+    expected = (-(-pixels.shape[1] // block_w)) * (-(-pixels.shape[0] // block_h)) * FORMATS[fmt]['bytes']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / 'level.png'
+        Image.fromarray(pixels).save(source)
+        if FORMATS[fmt]['encoder'] == 'astcenc':
+            target = Path(tmp) / 'level.astc'
+            cmd = [binary, '-cl', str(source), str(target), f'{block_w}x{block_h}', '-medium']
+            header_size = 16
+        else:
+            target = Path(tmp) / 'level.dds'
+            cmd = [binary, '-fd', 'BC7', '-miplevels', '1', str(source), str(target)]
+            header_size = None
+        subprocess.run(cmd, check=True, capture_output=True)
+        data = target.read_bytes()
+
+    if header_size is None:
+        # DDS: magic + 124-byte header, plus a DX10 header if present
+        header_size = 148 if data[84:88] == b'DX10' else 128
+    return data[header_size:header_size + expected]
+
+
+def encode_mips(image, fmt, mipmaps=True, workers=None, filter='box', mip_levels=None, chain=None):
+    """Encode an RGBA image (and its mip chain) into fmt.
+
+    chain may pass a precomputed mip chain (see mip_chain). Returns a list
+    of encoded level bytes, largest first.
+    """
+    if chain is None:
+        pixels = np.asarray(image.convert('RGBA'))
+        chain = mip_chain(pixels, mip_levels, filter) if mipmaps else [pixels]
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        if FORMATS[fmt]['encoder'] == 'numpy':
+            return [_encode_numpy(level, fmt, executor) for level in chain]
+        return list(executor.map(lambda level: _encode_external(level, fmt), chain))
+
+
+def _dfd(fmt):
+    """Build the KTX2 basic data format descriptor for fmt"""
+    info = FORMATS[fmt]
+    samples = info['dfd_samples']
+    block_size = 24 + 16 * len(samples)
+    block_w, block_h = info['block']
+    data = struct.pack('<IHH', 0, 2, block_size)
+    # colorModel, colorPrimaries (BT.709), transferFunction (linear), flags
+    data += struct.pack('<4B', info['dfd_model'], 1, 1, 0)
+    data += struct.pack('<4B', block_w - 1, block_h - 1, 0, 0)
+    data += struct.pack('<8B', info['bytes'], 0, 0, 0, 0, 0, 0, 0)
+    for channel, bit_offset, bit_length in samples:
+        data += struct.pack('<HBB4BII', bit_offset, bit_length - 1, channel,
+                            0, 0, 0, 0, 0, 0xFFFFFFFF)
+    return struct.pack('<I', 4 + len(data)) + data
+
+
+def write_ktx2(path, fmt, width, height, levels):
+    """Write encoded levels (largest first) to a KTX2 file"""
+    info = FORMATS[fmt]
+    dfd = _dfd(fmt)
+    level_count = len(levels)
+    index_end = 12 + 36 + 32 + 24 * level_count
+    dfd_offset = index_end
+    data_start = dfd_offset + len(dfd)
+    alignment = info['bytes']  # lcm(block size, 4)
+
+    # Level data is stored smallest mip first
+    offsets = [0] * level_count
+    position = data_start
+    for level in reversed(range(level_count)):
+        position += -position % alignment
+        offsets[level] = position
+        position += len(levels[level])
+
+    header = KTX2_IDENTIFIER
+    header += struct.pack('<9I', info['vk_format'], 1, width, height, 0, 0, 1, level_count, 0)
+    header += struct.pack('<4I2Q', dfd_offset, len(dfd), 0, 0, 0, 0)
+    for offset, level in zip(offsets, levels):
+        header += struct.pack('<3Q', offset, len(level), len(level))
+
+    with open(path, 'wb') as f:
+        f.write(header)
+        f.write(dfd)
+        for level in reversed(range(level_count)):
+            f.write(b'\0' * (offsets[level] - f.tell()))
+            f.write(levels[level])
+
+
+def write_dds(path, fmt, width, height, levels):
+    """Write encoded levels (largest first) to a DDS file (BCn only)"""
+    info = FORMATS[fmt]
+    if not fmt.startswith('bc'):
+        raise ValueError(f"DDS does not support {fmt}; use KTX2")
+    flags = 0x1 | 0x2 | 0x4 | 0x1000 | 0x80000  # CAPS, HEIGHT, WIDTH, PIXELFORMAT, LINEARSIZE
+    caps = 0x1000  # TEXTURE
+    if len(levels) > 1:
+        flags |= 0x20000  # MIPMAPCOUNT
+        caps |= 0x8 | 0x400000  # COMPLEX, MIPMAP
+    fourcc = info.get('dds_fourcc', b'DX10')
+    pixel_format = struct.pack('<II4s5I', 32, 0x4, fourcc, 0, 0, 0, 0, 0)
+    header = struct.pack('<7I', 124, flags, height, width, len(levels[0]), 0, len(levels))
+    header += b'\0' * 44 + pixel_format
+    header += struct.pack('<5I', caps, 0, 0, 0, 0)
+    with open(path, 'wb') as f:
+        f.write(b'DDS ' + header)
+        if fourcc == b'DX10':
+            # dxgiFormat, TEXTURE2D, miscFlag, arraySize, miscFlags2
+            f.write(struct.pack('<5I', info['dxgi_format'], 3, 0, 1, 0))
+        for level in levels:
+            f.write(level)
+
+
+def compress_texture(image, output_path, fmt, container='ktx2', mipmaps=True, workers=None,
+                     filter='box', mip_levels=None, chain=None):
+    """Encode an image into fmt and write it to a KTX2 or DDS container"""
+    levels = encode_mips(image, fmt, mipmaps, workers, filter, mip_levels, chain)
+    writer = write_dds if container == 'dds' else write_ktx2
+    writer(output_path, fmt, image.width, image.height, levels)
+    return len(levels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Encode textures into GPU compressed formats')
+    parser.add_argument('--input', required=True, help='Input image')
+    parser.add_argument('--output', help='Output file (default: <input>.<format>.<container>)')
+    parser.add_argument('--format', required=True, help=f"One of: {', '.join(FORMATS)}")
+    parser.add_argument('--container', choices=['ktx2', 'dds'], default='ktx2')
+    parser.add_argument('--no-mipmaps', action='store_true', help='Only encode the top level')
+    parser.add_argument('--mip-filter', choices=MIP_FILTERS, default='box',
+                        help='Mipmap downsampling filter')
+    parser.add_argument('--mip-levels', type=int, help='Mip levels below the base (default: down to 1x1)')
+    parser.add_argument('--workers', type=int, help='Encoder threads (default: CPU count)')
+
+    args = parser.parse_args()
+
+    fmt = resolve_format(args.format)
+    if fmt is None:
+        print(f"Error: Unknown format {args.format}")
+        sys.exit(1)
+    if not is_available(fmt):
+        print(f"Error: {fmt} needs numpy or a local encoder binary")
+        sys.exit(1)
+    if args.container == 'dds' and not fmt.startswith('bc'):
+        print(f"Error: DDS does not support {fmt}; use --container ktx2")
+        sys.exit(1)
+
+    input_path = Path(args.input)
+    output_path = args.output or input_path.with_name(f"{input_path.stem}.{fmt}.{args.container}")
+    with Image.open(input_path) as image:
+        levels = compress_texture(image, output_path, fmt, args.container,
+                                  not args.no_mipmaps, args.workers,
+                                  args.mip_filter, args.mip_levels)
+    print(f"Wrote {output_path} ({fmt}, {levels} mip level(s))")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,7 @@
 Asset Validation Script
 
 Validates assets for common issues:
-- Texture atlases: bleeding, power-of-two, size limits
+- Texture atlases: bleeding, power-of-two, size limits, frame bounds and overlaps
 - Audio: clipping, silence, file sizes
 - Models: triangle counts, naming conventions
 - Animations: frame counts, metadata consistency
@@ -58,25 +58,48 @@ class AssetValidator:
                 self.info.append(f"{texture_path}: Within size limits ✓")
 
             # Check for metadata
-            metadata_path = texture_path.with_suffix('.json')
-            if metadata_path.exists():
-                self._validate_texture_metadata(texture_path, metadata_path, img)
+            metadata_path, page = self._find_texture_metadata(texture_path)
+            if metadata_path:
+                self._validate_texture_metadata(texture_path, metadata_path, img, page)
             else:
                 self.warnings.append(f"{texture_path}: No metadata file found")
 
         except Exception as e:
             self.errors.append(f"{texture_path}: Failed to validate: {e}")
 
-    def _validate_texture_metadata(self, texture_path, metadata_path, image):
+    @staticmethod
+    def _find_texture_metadata(texture_path):
+        """Find the metadata file and page index for an atlas texture.
+
+        Page N > 0 of a multi-page atlas is saved as '<atlas>-N.png' and
+        shares '<atlas>.json' with page 0.
+        """
+        metadata_path = texture_path.with_suffix('.json')
+        if metadata_path.exists():
+            return metadata_path, 0
+
+        stem, _, page = texture_path.stem.rpartition('-')
+        if stem and page.isdigit():
+            metadata_path = texture_path.with_name(f"{stem}.json")
+            if metadata_path.exists():
+                return metadata_path, int(page)
+        return None, None
+
+    def _validate_texture_metadata(self, texture_path, metadata_path, image, page=0):
         """Validate texture atlas metadata"""
         try:
             with open(metadata_path, 'r') as f:
                 metadata = json.load(f)
 
-            frames = metadata.get('frames', {})
+            frames = {
+                frame_name: frame_data
+                for frame_name, frame_data in metadata.get('frames', {}).items()
+                if frame_data.get('page', 0) == page
+            }
             print(f"  Frames: {len(frames)}")
 
             # Validate frame positions
+            footprints = {}
             for frame_name, frame_data in frames.items():
                 frame_rect = frame_data.get('frame', {})
                 x = frame_rect.get('x', 0)
@@ -84,6 +107,16 @@ class AssetValidator:
                 w = frame_rect.get('w', 0)
                 h = frame_rect.get('h', 0)
 
+                # Frame size is unrotated; a rotated frame covers h x w
+                if frame_data.get('rotated', False):
+                    source = frame_data.get('spriteSourceSize')
+                    if source and (source.get('w'), source.get('h')) != (w, h):
+                        self.errors.append(
+                            f"{texture_path}: Rotated frame '{frame_name}' size {w}x{h} "
+                            f"does not match its spriteSourceSize"
+                        )
+                    w, h = h, w
+
                 # Check if frame is within image bounds
                 if x + w > image.width or y + h > image.height:
                     self.errors.append(
@@ -91,11 +124,30 @@ class AssetValidator:
                         f"({x+w}x{y+h} > {image.width}x{image.height})"
                     )
 
+                # Duplicate sprites share one footprint
+                footprints.setdefault((x, y, w, h), frame_name)
+
+            self._check_frame_overlaps(texture_path, footprints)
+
             self.info.append(f"{texture_path}: Metadata valid ✓")
 
         except Exception as e:
             self.errors.append(f"{metadata_path}: Failed to parse metadata: {e}")
 
+    def _check_frame_overlaps(self, texture_path, footprints):
+        """Report frames whose atlas footprints overlap (sweep over x)"""
+        active = []
+        for rect in sorted(footprints):
+            x, y, w, h = rect
+            active = [other for other in active if other[0] + other[2] > x]
+            for other in active:
+                if y < other[1] + other[3] and other[1] < y + h:
+                    self.errors.append(
+                        f"{texture_path}: Frames '{footprints[other]}' and "
+                        f"'{footprints[rect]}' overlap"
+                    )
+            active.append(rect)
+
     def validate_audio(self, audio_path, check_clipping=True, check_silence=True, max_size_mb=10):
         """Validate audio file"""
         print(f"\nValidating audio: {audio_path}")
@@ -190,9 +242,19 @@ class AssetValidator:
                     f"(metadata says {frame_count}, actual {len(frames)})"
                 )
 
-            # Validate each frame
+            # Validate each frame (delta frames are drawn from their layers)
             for i, frame in enumerate(frames):
-                required_frame_fields = ['x', 'y', 'w', 'h', 'duration']
+                required_frame_fields = ['w', 'h', 'duration']
+                if 'layers' in frame:
+                    required_frame_fields.append('keyframe')
+                    for layer in frame['layers']:
+                        for field in ('x', 'y', 'w', 'h', 'offset'):
+                            if field not in layer:
+                                self.errors.append(
+                                    f"{metadata_path}: Frame {i} layer missing field '{field}'"
+                                )
+                else:
+                    required_frame_fields[:0] = ['x', 'y']
                 for field in required_frame_fields:
                     if field not in frame:
                         self.errors.append(
@@ -4,28 +4,139 @@ Security Reminder Hook for Claude Code
 This hook checks for security patterns in file edits and warns about potential vulnerabilities.
 """
 
+import hashlib
+import io
 import json
+import logging
+import logging.handlers
+import marshal
 import os
-import random
+import re
+import sqlite3
 import sys
+import time
+import tokenize
+from contextlib import contextmanager
 from datetime import datetime
 
-# Debug log file
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+# Debug logging is disabled unless SECURITY_REMINDER_LOG_LEVEL is set to
+# one of debug/info/warning/error. Records are written as JSON lines to a
+# size-rotated file and buffered in memory until the process exits.
+LOG_LEVEL_ENV = "SECURITY_REMINDER_LOG_LEVEL"
+LOG_FILE_ENV = "SECURITY_REMINDER_LOG_FILE"
 DEBUG_LOG_FILE = "/tmp/security-warnings-log.txt"
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 3
+LOG_BUFFER_RECORDS = 64
+
+_logger = None
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Format log records as one JSON object per line."""
 
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname.lower(),
+            "pid": record.process,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry)
+
+
+def get_logger():
+    """Return the hook logger, configuring it on first use."""
+    global _logger
+    if _logger is not None:
+        return _logger
+
+    _logger = logging.getLogger("security_reminder_hook")
+    _logger.propagate = False
+    level_name = os.environ.get(LOG_LEVEL_ENV, "").upper()
+    level = logging.getLevelName(level_name) if level_name else None
+    if not isinstance(level, int):
+        # Logging disabled (or unknown level): skip handler setup entirely
+        _logger.disabled = True
+        return _logger
 
-def debug_log(message):
-    """Append debug message to log file with timestamp."""
     try:
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        with open(DEBUG_LOG_FILE, "a") as f:
-            f.write(f"[{timestamp}] {message}\n")
-    except Exception as e:
+        file_handler = logging.handlers.RotatingFileHandler(
+            os.environ.get(LOG_FILE_ENV, DEBUG_LOG_FILE),
+            maxBytes=LOG_MAX_BYTES,
+            backupCount=LOG_BACKUP_COUNT,
+            delay=True,
+        )
+        file_handler.setFormatter(JsonLineFormatter())
+        # Buffer records and write them in one go at exit (or on error)
+        _logger.addHandler(
+            logging.handlers.MemoryHandler(
+                LOG_BUFFER_RECORDS, flushLevel=logging.ERROR, target=file_handler
+            )
+        )
+        _logger.setLevel(level)
+    except Exception:
         # Silently ignore logging errors to avoid disrupting the hook
-        pass
+        _logger.disabled = True
+    return _logger
+
+
+def debug_log(message, level=logging.DEBUG, **fields):
+    """Log a message with optional structured fields."""
+    logger = get_logger()
+    if logger.isEnabledFor(level):
+        logger.log(level, message, extra={"fields": fields})
+
+
+@contextmanager
+def timed(timings, stage):
+    """Record the wall time of a block in milliseconds under timings[stage]."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = round((time.perf_counter() - start) * 1000, 3)
+
+
+# State database tracking warnings shown, keyed by (session_id, warning_key)
+STATE_DB_FILE = "~/.claude/security_warnings_state.db"
+STATE_DB_TIMEOUT = 2.0
+STATE_TTL_SECONDS = 30 * 24 * 60 * 60
+STATE_CLEANUP_BATCH = 100
+# PRAGMA user_version once every pre-database JSON state file has been swept
+STATE_DB_LEGACY_SWEPT = 1
+
+# Content scan mode: "raw" matches substrings anywhere in the content,
+# "tokens" only matches in code (comments and string literals are skipped)
+SCAN_MODE_ENV = "SECURITY_REMINDER_SCAN_MODE"
+TOKENIZE_MAX_CHARS = 512 * 1024
+PYTHON_EXTENSIONS = (".py", ".pyi", ".pyw")
+JS_EXTENSIONS = (".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx", ".mts", ".cts")
+# Keywords after which a "/" starts a regex literal rather than a division
+JS_REGEX_PREFIXES = frozenset(
+    "await case delete do else in instanceof new of return throw typeof void yield".split()
+)
 
+# When enabled, Edit/MultiEdit content is only scanned where new_string
+# introduces text that was not already in old_string
+DIFF_MODE_ENV = "SECURITY_REMINDER_DIFF_MODE"
 
-# State file to track warnings shown (session-scoped using session ID)
+# External pattern packs: *.json / *.toml files in these directories add
+# rules on top of SECURITY_PATTERNS. Later directories override rules with
+# the same ruleName from earlier ones.
+PATTERN_PACK_DIRNAME = "security-patterns"
+# One cache per project pack directory ({key}), so sessions in different
+# projects do not keep invalidating each other's cache
+PATTERN_PACK_CACHE_FILE = "~/.claude/security_patterns_cache_{key}.bin"
+PATTERN_PACK_CACHE_VERSION = 1
 
 # Security patterns configuration
 SECURITY_PATTERNS = [
@@ -126,65 +237,667 @@ Only use exec() if you absolutely need shell features and the input is guarantee
 ]
 
 
-def get_state_file(session_id):
-    """Get session-specific state file path."""
+def get_pattern_pack_dirs(project_dir=None):
+    """Return pattern pack directories in increasing order of precedence."""
+    plugin_root = os.environ.get("CLAUDE_PLUGIN_ROOT") or os.path.dirname(
+        os.path.dirname(os.path.abspath(__file__))
+    )
+    dirs = [
+        os.path.join(plugin_root, PATTERN_PACK_DIRNAME),
+        os.path.expanduser(os.path.join("~/.claude", PATTERN_PACK_DIRNAME)),
+    ]
+    project_dir = os.environ.get("CLAUDE_PROJECT_DIR") or project_dir
+    if project_dir:
+        dirs.append(os.path.join(project_dir, ".claude", PATTERN_PACK_DIRNAME))
+    return dirs
+
+
+def list_pattern_pack_files(pack_dirs):
+    """Return (path, mtime_ns, size) for every pack file, in load order."""
+    pack_files = []
+    for pack_dir in pack_dirs:
+        try:
+            entries = sorted(os.scandir(pack_dir), key=lambda entry: entry.name)
+        except OSError:
+            continue  # Missing directories are the common case
+        for entry in entries:
+            if entry.name.endswith((".json", ".toml")) and entry.is_file():
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue  # Removed while listing
+                pack_files.append((entry.path, stat.st_mtime_ns, stat.st_size))
+    return pack_files
+
+
+def read_pattern_pack(path):
+    """Parse one pack file and return its list of rule dicts."""
+    if path.endswith(".toml"):
+        if tomllib is None:
+            debug_log(f"Skipping {path}: TOML packs need Python 3.11+", logging.WARNING)
+            return []
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    else:
+        with open(path, "r") as f:
+            data = json.load(f)
+    rules = data.get("patterns", []) if isinstance(data, dict) else []
+    return rules if isinstance(rules, list) else []
+
+
+def glob_to_regex(glob):
+    """Translate a path glob into a regex source string.
+
+    "**/" matches any number of directories, "*" and "?" do not cross "/",
+    and globs without a "/" match the file name in any directory. Globs
+    are matched against project-relative paths; see project_relative_path().
+    """
+    if "/" not in glob:
+        glob = "**/" + glob
+    parts = []
+    i = 0
+    while i < len(glob):
+        if glob.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif glob.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif glob[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif glob[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        else:
+            parts.append(re.escape(glob[i]))
+            i += 1
+    return "".join(parts)
+
+
+def project_relative_path(file_path, project_dir=None):
+    """Return file_path relative to the project directory, "/"-separated.
+
+    The project directory is CLAUDE_PROJECT_DIR, else project_dir, else the
+    current directory. Paths outside it keep their absolute form without
+    the leading "/".
+    """
+    root = os.path.abspath(
+        os.environ.get("CLAUDE_PROJECT_DIR") or project_dir or os.getcwd()
+    )
+    absolute = os.path.normpath(os.path.join(root, file_path))
+    relative = os.path.relpath(absolute, root)
+    if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+        return absolute.replace(os.sep, "/").lstrip("/")
+    return relative.replace(os.sep, "/")
+
+
+def compile_pattern_packs(pack_files):
+    """Merge pack rules and build the combined path regex source.
+
+    Returns a dict with "rules" (ruleName, substrings, reminder) and
+    "path_regex", an alternation with one named group per rule that has
+    path globs, so a single fullmatch finds the first matching rule.
+    """
+    merged = {}
+    for path, _, _ in pack_files:
+        try:
+            rules = read_pattern_pack(path)
+        except (OSError, ValueError) as e:
+            debug_log(f"Failed to load pattern pack {path}: {e}", logging.WARNING)
+            continue
+        for rule in rules:
+            if not isinstance(rule, dict):
+                continue
+            rule_name = rule.get("ruleName")
+            reminder = rule.get("reminder")
+            substrings = rule.get("substrings", [])
+            path_globs = rule.get("path_globs", [])
+            if not all(
+                isinstance(field, list) and all(isinstance(item, str) for item in field)
+                for field in (substrings, path_globs)
+            ):
+                debug_log(
+                    f"Skipping rule {rule_name!r} in {path}: substrings and "
+                    "path_globs must be lists of strings",
+                    logging.WARNING,
+                )
+                continue
+            substrings = [s for s in substrings if s]
+            path_globs = [g for g in path_globs if g]
+            if not rule_name or not reminder or not (substrings or path_globs):
+                debug_log(f"Skipping invalid rule in {path}: {rule_name}", logging.WARNING)
+                continue
+            merged[rule_name] = {
+                "ruleName": rule_name,
+                "substrings": substrings,
+                "path_globs": path_globs,
+                "reminder": reminder,
+            }
+
+    rules = list(merged.values())
+    alternatives = []
+    for index, rule in enumerate(rules):
+        globs = "|".join(glob_to_regex(glob) for glob in rule.pop("path_globs"))
+        if globs:
+            alternatives.append(f"(?P<r{index}>{globs})")
+    return {"rules": rules, "path_regex": "|".join(alternatives)}
+
+
+def load_pattern_packs(project_dir=None):
+    """Load external pattern packs, using the compiled cache when valid.
+
+    The cache is keyed by the path, mtime and size of every pack file, so
+    an unchanged set of packs costs one directory listing per pack
+    directory plus one read of the cache file. Each project pack directory
+    gets its own cache file. Returns None if no packs are installed.
+    """
+    pack_dirs = get_pattern_pack_dirs(project_dir)
+    pack_files = list_pattern_pack_files(pack_dirs)
+    if not pack_files:
+        return None
+
+    cache_key = [list(pack_file) for pack_file in pack_files]
+    cache_file = os.path.expanduser(
+        PATTERN_PACK_CACHE_FILE.format(
+            key=hashlib.sha256("\0".join(pack_dirs).encode()).hexdigest()[:16]
+        )
+    )
+    compiled = None
+    try:
+        with open(cache_file, "rb") as f:
+            cached = marshal.load(f)
+        if (
+            cached.get("version") == PATTERN_PACK_CACHE_VERSION
+            and cached.get("key") == cache_key
+        ):
+            compiled = cached["packs"]
+    except (OSError, EOFError, ValueError, TypeError, AttributeError, KeyError):
+        pass  # Missing or stale cache: rebuild below
+
+    if compiled is None:
+        compiled = compile_pattern_packs(pack_files)
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+            with open(tmp_file, "wb") as f:
+                marshal.dump(
+                    {
+                        "version": PATTERN_PACK_CACHE_VERSION,
+                        "key": cache_key,
+                        "packs": compiled,
+                    },
+                    f,
+                )
+            os.replace(tmp_file, cache_file)
+        except (OSError, ValueError) as e:
+            debug_log(f"Failed to write pattern pack cache: {e}", logging.WARNING)
+
+    try:
+        path_matcher = re.compile(compiled["path_regex"]) if compiled["path_regex"] else None
+    except re.error as e:
+        debug_log(f"Invalid pattern pack path globs: {e}", logging.WARNING)
+        path_matcher = None
+    return {"rules": compiled["rules"], "path_matcher": path_matcher}
+
+
+def get_state_db():
+    """Get the path of the shared warning state database."""
+    return os.path.expanduser(STATE_DB_FILE)
+
+
+def get_legacy_state_file(session_id):
+    """Get the pre-database session-specific state file path."""
     return os.path.expanduser(f"~/.claude/security_warnings_state_{session_id}.json")
 
 
-def cleanup_old_state_files():
-    """Remove state files older than 30 days."""
+def open_state_db():
+    """Open (and create if needed) the warning state database.
+
+    The database uses WAL journaling so concurrent hook processes from
+    different sessions can read while another one writes.
+    """
+    db_path = get_state_db()
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=STATE_DB_TIMEOUT, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS shown_warnings (
+            session_id TEXT NOT NULL,
+            warning_key TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (session_id, warning_key)
+        ) WITHOUT ROWID"""
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS shown_warnings_created_at "
+        "ON shown_warnings (created_at)"
+    )
+    return conn
+
+
+def migrate_legacy_state(conn, session_id):
+    """Import and remove the JSON state file written by older hook versions.
+
+    A file that does not hold a list of warning keys is discarded.
+    """
+    state_file = get_legacy_state_file(session_id)
+    if not os.path.exists(state_file):
+        return
     try:
-        state_dir = os.path.expanduser("~/.claude")
-        if not os.path.exists(state_dir):
-            return
+        with open(state_file, "r") as f:
+            warning_keys = json.load(f)
+        if not isinstance(warning_keys, list):
+            raise TypeError(f"expected a list, got {type(warning_keys).__name__}")
+        now = time.time()
+        conn.executemany(
+            "INSERT OR IGNORE INTO shown_warnings VALUES (?, ?, ?)",
+            [(session_id, str(key), now) for key in warning_keys],
+        )
+    except sqlite3.Error as e:
+        debug_log(f"Failed to migrate legacy state file: {e}", logging.WARNING)
+        return  # Keep the file for the next attempt
+    except (ValueError, TypeError, OSError) as e:
+        debug_log(f"Dropping unreadable legacy state file {state_file}: {e}", logging.WARNING)
+    try:
+        os.remove(state_file)
+    except OSError:
+        pass  # Removed by a concurrent hook
+
 
-        current_time = datetime.now().timestamp()
-        thirty_days_ago = current_time - (30 * 24 * 60 * 60)
+def sweep_legacy_state_files(conn):
+    """Import or delete every JSON state file left by older hook versions.
 
-        for filename in os.listdir(state_dir):
-            if filename.startswith("security_warnings_state_") and filename.endswith(
-                ".json"
+    Runs once per database (tracked in PRAGMA user_version): files older
+    than the state TTL are deleted, newer ones are imported under their
+    session id with the file's mtime and then removed. Once the sweep is
+    recorded this is a single read, without taking the write lock.
+    """
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= STATE_DB_LEGACY_SWEPT:
+            return
+        conn.execute("BEGIN IMMEDIATE")
+    except sqlite3.Error as e:
+        debug_log(f"Failed to lock state database for sweep: {e}", logging.WARNING)
+        return
+    try:
+        # Another hook may have swept while this one waited for the lock
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= STATE_DB_LEGACY_SWEPT:
+            return
+        state_dir = os.path.dirname(get_legacy_state_file(""))
+        cutoff = time.time() - STATE_TTL_SECONDS
+        try:
+            filenames = os.listdir(state_dir)
+        except OSError:
+            filenames = []
+        for filename in filenames:
+            if not (
+                filename.startswith("security_warnings_state_")
+                and filename.endswith(".json")
             ):
-                file_path = os.path.join(state_dir, filename)
-                try:
-                    file_mtime = os.path.getmtime(file_path)
-                    if file_mtime < thirty_days_ago:
-                        os.remove(file_path)
-                except (OSError, IOError):
-                    pass  # Ignore errors for individual file cleanup
-    except Exception:
-        pass  # Silently ignore cleanup errors
+                continue
+            file_path = os.path.join(state_dir, filename)
+            session_id = filename[len("security_warnings_state_") : -len(".json")]
+            try:
+                mtime = os.path.getmtime(file_path)
+                if mtime >= cutoff:
+                    with open(file_path, "r") as f:
+                        warning_keys = json.load(f)
+                    if not isinstance(warning_keys, list):
+                        raise TypeError(f"expected a list, got {type(warning_keys).__name__}")
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO shown_warnings VALUES (?, ?, ?)",
+                        [(session_id, str(key), mtime) for key in warning_keys],
+                    )
+            except (ValueError, TypeError, OSError) as e:
+                debug_log(f"Dropping unreadable legacy state file {filename}: {e}", logging.WARNING)
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass  # Removed by a concurrent hook, or not ours to remove
+        conn.execute(f"PRAGMA user_version = {STATE_DB_LEGACY_SWEPT}")
+    except sqlite3.Error as e:
+        debug_log(f"Failed to sweep legacy state files: {e}", logging.WARNING)
+    finally:
+        try:
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            pass
 
 
-def load_state(session_id):
-    """Load the state of shown warnings from file."""
-    state_file = get_state_file(session_id)
-    if os.path.exists(state_file):
-        try:
-            with open(state_file, "r") as f:
-                return set(json.load(f))
-        except (json.JSONDecodeError, IOError):
-            return set()
-    return set()
+def cleanup_expired_warnings(conn):
+    """Remove a bounded batch of warnings older than the state TTL.
 
+    Each call deletes at most STATE_CLEANUP_BATCH rows through the
+    created_at index, so expiry is spread across invocations instead of
+    happening in one large sweep.
+    """
+    cutoff = time.time() - STATE_TTL_SECONDS
+    try:
+        conn.execute(
+            """DELETE FROM shown_warnings WHERE (session_id, warning_key) IN (
+                SELECT session_id, warning_key FROM shown_warnings
+                WHERE created_at < ? LIMIT ?
+            )""",
+            (cutoff, STATE_CLEANUP_BATCH),
+        )
+    except sqlite3.Error as e:
+        debug_log(f"Failed to clean up expired warnings: {e}", logging.WARNING)
 
-def save_state(session_id, shown_warnings):
-    """Save the state of shown warnings to file."""
-    state_file = get_state_file(session_id)
+
+def mark_warning_shown(session_id, warning_key):
+    """Record a warning for the session.
+
+    Returns True if the warning had not been shown in this session yet.
+    The check and the insert happen in one statement, so two concurrent
+    hook invocations can never both report the same warning as new. If
+    the database is unavailable the warning is treated as new.
+    """
+    try:
+        conn = open_state_db()
+    except (OSError, sqlite3.Error) as e:
+        debug_log(f"Failed to open state database: {e}", logging.WARNING)
+        return True
+
+    try:
+        sweep_legacy_state_files(conn)
+        migrate_legacy_state(conn, session_id)
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO shown_warnings VALUES (?, ?, ?)",
+            (session_id, warning_key, time.time()),
+        )
+        cleanup_expired_warnings(conn)
+        return cursor.rowcount == 1
+    except sqlite3.Error as e:
+        debug_log(f"Failed to record warning state: {e}", logging.WARNING)
+        return True
+    finally:
+        conn.close()
+
+
+def _line_offsets(content):
+    """Return the character offset at which each (1-based) line starts.
+
+    Lines are split exactly as the tokenizer's readline sees them (on
+    "\n" only); str.splitlines would also break on "\r", "\x0c",
+    "\x85", "\u2028" and friends and shift every later offset.
+    """
+    offsets = [0, 0]
+    for line in io.StringIO(content).readlines():
+        offsets.append(offsets[-1] + len(line))
+    return offsets
+
+
+def mask_python_non_code(content):
+    """Blank out comments and string literals in Python source.
+
+    Offsets are preserved so the masked text lines up with the original.
+    Returns None if the content cannot be tokenized (e.g. an Edit snippet
+    that starts inside a string).
+    """
+    masked_types = {tokenize.COMMENT, tokenize.STRING}
+    if hasattr(tokenize, "FSTRING_MIDDLE"):
+        # Python 3.12+ tokenizes f-strings; only the literal parts are text
+        masked_types.add(tokenize.FSTRING_MIDDLE)
+
+    offsets = _line_offsets(content)
+    chars = list(content)
     try:
-        os.makedirs(os.path.dirname(state_file), exist_ok=True)
-        with open(state_file, "w") as f:
-            json.dump(list(shown_warnings), f)
-    except IOError as e:
-        debug_log(f"Failed to save state file: {e}")
-        pass  # Fail silently if we can't save state
+        for token in tokenize.generate_tokens(io.StringIO(content).readline):
+            if token.type not in masked_types:
+                continue
+            start = offsets[token.start[0]] + token.start[1]
+            end = offsets[token.end[0]] + token.end[1]
+            for i in range(start, end):
+                if chars[i] != "\n":
+                    chars[i] = " "
+    except (tokenize.TokenError, IndentationError, SyntaxError, IndexError):
+        return None
+    return "".join(chars)
+
+
+_JS_VALUE = "0"  # Previous token was a literal or number
+
+
+def _is_js_word_char(c):
+    return c.isalnum() or c in "_$"
+
+
+def mask_js_non_code(content):
+    """Blank out comments, string and regex literals in JavaScript/TypeScript.
+
+    A single left-to-right pass over the content. Template literal text is
+    masked while ${...} substitutions are kept as code. Whether a "/"
+    starts a regex literal or is a division is decided from the previous
+    significant token; when that cannot be told (after "}", which may end
+    a block or an object literal, or after "++"/"--") and the text would
+    lex as a regex, None is returned so the caller falls back to the raw
+    scan.
+    """
+    chars = list(content)
+    length = len(content)
+    # Brace depth at which each open template substitution started
+    template_stack = []
+    brace_depth = 0
+    # Previous significant token: "" at the start, a punctuator character,
+    # an identifier or keyword, or VALUE for literals and numbers
+    prev = ""
+    i = 0
+
+    def blank(start, end):
+        for j in range(start, min(end, length)):
+            if chars[j] != "\n":
+                chars[j] = " "
+
+    def skip_template_text(start):
+        # Scan template text after the opening "`" or closing "}" at start;
+        # return the index after the closing backtick, or after "${" when a
+        # substitution begins
+        j = start + 1
+        while j < length:
+            c = content[j]
+            if c == "\\":
+                j += 2
+            elif c == "`":
+                blank(start, j + 1)
+                return j + 1, False
+            elif c == "$" and j + 1 < length and content[j + 1] == "{":
+                blank(start, j)
+                return j + 2, True
+            else:
+                j += 1
+        blank(start, length)
+        return length, False
+
+    def regex_end(start):
+        # Index after the regex literal starting with "/" at start (flags
+        # included), or None if the line ends first
+        j = start + 1
+        in_class = False
+        while j < length:
+            c = content[j]
+            if c == "\n":
+                return None
+            if c == "\\":
+                j += 1
+            elif c == "[":
+                in_class = True
+            elif c == "]":
+                in_class = False
+            elif c == "/" and not in_class:
+                j += 1
+                while j < length and _is_js_word_char(content[j]):
+                    j += 1
+                return j
+            j += 1
+        return None
+
+    while i < length:
+        c = content[i]
+        nxt = content[i + 1] if i + 1 < length else ""
+        if c == "/" and nxt == "/":
+            end = content.find("\n", i)
+            end = length if end == -1 else end
+            blank(i, end)
+            i = end
+        elif c == "/" and nxt == "*":
+            end = content.find("*/", i + 2)
+            end = length if end == -1 else end + 2
+            blank(i, end)
+            i = end
+        elif c == "/":
+            ambiguous = prev in ("}", "++", "--")
+            end = None
+            if ambiguous or prev in JS_REGEX_PREFIXES or not (
+                prev in (_JS_VALUE, ")", "]") or _is_js_word_char(prev[0])
+            ):
+                end = regex_end(i)
+            if end is not None and ambiguous:
+                return None  # Regex or division: cannot tell which
+            if end is None:
+                prev = c
+                i += 1
+            else:
+                blank(i, end)
+                prev = _JS_VALUE
+                i = end
+        elif c in ("'", '"'):
+            j = i + 1
+            while j < length and content[j] != c and content[j] != "\n":
+                j += 2 if content[j] == "\\" else 1
+            blank(i, j + 1)
+            prev = _JS_VALUE
+            i = j + 1
+        elif c == "`":
+            i, opened = skip_template_text(i)
+            if opened:
+                template_stack.append(brace_depth)
+                brace_depth += 1
+            prev = "{" if opened else _JS_VALUE
+        elif c == "{":
+            brace_depth += 1
+            prev = c
+            i += 1
+        elif c == "}":
+            brace_depth -= 1
+            prev = c
+            if template_stack and template_stack[-1] == brace_depth:
+                # End of a ${...} substitution: resume the template text
+                template_stack.pop()
+                i, opened = skip_template_text(i)
+                if opened:
+                    template_stack.append(brace_depth)
+                    brace_depth += 1
+                prev = "{" if opened else _JS_VALUE
+            else:
+                i += 1
+        elif _is_js_word_char(c):
+            j = i + 1
+            while j < length and _is_js_word_char(content[j]):
+                j += 1
+            prev = _JS_VALUE if c.isdigit() else content[i:j]
+            i = j
+        elif c.isspace():
+            i += 1
+        elif c in "+-" and prev == c and content[i - 1] == c:
+            prev = c + c
+            i += 1
+        else:
+            prev = c
+            i += 1
+    return "".join(chars)
+
+
+def mask_non_code(file_path, content):
+    """Return content with comments and strings blanked, or None.
+
+    None means the file type is unknown, the content is larger than
+    TOKENIZE_MAX_CHARS, or it could not be tokenized; callers then fall
+    back to the raw substring scan.
+    """
+    if len(content) > TOKENIZE_MAX_CHARS:
+        return None
+    lowered = file_path.lower()
+    if lowered.endswith(PYTHON_EXTENSIONS):
+        return mask_python_non_code(content)
+    if lowered.endswith(JS_EXTENSIONS):
+        return mask_js_non_code(content)
+    return None
+
+
+def _is_word_char(c):
+    return c.isalnum() or c == "_"
+
+
+def contains_code_substring(code, substring, start=0, end=None):
+    """Check for substring in masked code, respecting identifier boundaries.
+
+    If the substring starts (or ends) with an identifier character, the
+    match must not be preceded (or followed) by one, so "pickle" does not
+    match "pickleball" and "eval(" does not match "retrieval(". Only
+    matches lying entirely within code[start:end] are considered.
+    """
+    check_start = _is_word_char(substring[0])
+    check_end = _is_word_char(substring[-1])
+    if end is None:
+        end = len(code)
+    match = code.find(substring, start, end)
+    while match != -1:
+        match_end = match + len(substring)
+        if not (
+            check_start and match > 0 and _is_word_char(code[match - 1])
+        ) and not (
+            check_end and match_end < len(code) and _is_word_char(code[match_end])
+        ):
+            return True
+        match = code.find(substring, match + 1, end)
+    return False
 
 
-def check_patterns(file_path, content):
-    """Check if file path or content matches any security patterns."""
+def content_has_substring(content, code, substring, spans):
+    """Check for substring in content, optionally limited to inserted spans.
+
+    When spans is given, only matches overlapping one of the (start, end)
+    ranges count. Any match lying within len(substring) - 1 characters of
+    a span overlaps it, so each span is searched with that much context.
+    """
+    text = content if code is None else code
+    if spans is None:
+        windows = [(0, len(text))]
+    else:
+        context = len(substring) - 1
+        windows = [
+            (max(0, start - context), min(len(text), end + context))
+            for start, end in spans
+        ]
+
+    for start, end in windows:
+        if code is not None:
+            if contains_code_substring(code, substring, start, end):
+                return True
+        elif content.find(substring, start, end) != -1:
+            return True
+    return False
+
+
+def check_patterns(file_path, content, spans=None, packs=None, project_dir=None):
+    """Check if file path or content matches any security patterns.
+
+    If spans is given, content patterns only match text overlapping those
+    (start, end) ranges of content; see inserted_spans(). Rules from
+    external pattern packs (see load_pattern_packs()) are checked after
+    the built-in ones, with their path globs matched against the path
+    relative to project_dir (see project_relative_path()).
+    """
     # Normalize path by removing leading slashes
     normalized_path = file_path.lstrip("/")
 
+    # In tokens mode, only match in code; fall back to a raw scan otherwise
+    code = None
+    if content and os.environ.get(SCAN_MODE_ENV, "raw") == "tokens":
+        code = mask_non_code(file_path, content)
+
     for pattern in SECURITY_PATTERNS:
         # Check path-based patterns
         if "path_check" in pattern and pattern["path_check"](normalized_path):
@@ -193,12 +906,71 @@ def check_patterns(file_path, content):
         # Check content-based patterns
         if "substrings" in pattern and content:
             for substring in pattern["substrings"]:
-                if substring in content:
+                if content_has_substring(content, code, substring, spans):
+                    return pattern["ruleName"], pattern["reminder"]
+
+    if not packs:
+        return None, None
+
+    # One match against the combined glob regex finds the first pack rule
+    # whose path globs match
+    path_rule_index = None
+    if packs["path_matcher"] is not None:
+        match = packs["path_matcher"].fullmatch(
+            project_relative_path(file_path, project_dir)
+        )
+        if match:
+            path_rule_index = int(match.lastgroup[1:])
+
+    for index, pattern in enumerate(packs["rules"]):
+        if index == path_rule_index:
+            return pattern["ruleName"], pattern["reminder"]
+        if content:
+            for substring in pattern["substrings"]:
+                if content_has_substring(content, code, substring, spans):
                     return pattern["ruleName"], pattern["reminder"]
 
     return None, None
 
 
+def inserted_spans(old_string, new_string):
+    """Return the (start, end) ranges of new_string not present in old_string.
+
+    Runs in linear time: the common prefix and suffix are trimmed, then the
+    remaining middle is split into lines, and lines that already occur in
+    old_string (ignoring surrounding whitespace) are dropped, so re-indented
+    or moved code does not count as new.
+    """
+    limit = min(len(old_string), len(new_string))
+    prefix = 0
+    while prefix < limit and old_string[prefix] == new_string[prefix]:
+        prefix += 1
+    suffix = 0
+    while (
+        suffix < limit - prefix
+        and old_string[-1 - suffix] == new_string[-1 - suffix]
+    ):
+        suffix += 1
+
+    middle_end = len(new_string) - suffix
+    if prefix >= middle_end:
+        return []  # Pure deletion
+
+    old_lines = {line.strip() for line in old_string.splitlines()}
+    spans = []
+    start = prefix
+    for line in new_string[prefix:middle_end].splitlines(keepends=True):
+        end = start + len(line)
+        stripped = line.strip()
+        if stripped and stripped not in old_lines:
+            if spans and spans[-1][1] == start:
+                spans[-1] = (spans[-1][0], end)
+            else:
+                spans.append((start, end))
+        start = end
+    return spans
+
+
 def extract_content_from_input(tool_name, tool_input):
     """Extract content to check from tool input based on tool type."""
     if tool_name == "Write":
@@ -214,6 +986,29 @@ def extract_content_from_input(tool_name, tool_input):
     return ""
 
 
+def extract_inserted_spans(tool_name, tool_input):
+    """Return the inserted spans of the extracted content for edit tools.
+
+    Spans index into the string returned by extract_content_from_input.
+    Returns None for tools whose whole content should be scanned.
+    """
+    if tool_name == "Edit":
+        edits = [tool_input]
+    elif tool_name == "MultiEdit":
+        edits = tool_input.get("edits", [])
+    else:
+        return None
+
+    spans = []
+    offset = 0
+    for edit in edits:
+        new_string = edit.get("new_string", "")
+        for start, end in inserted_spans(edit.get("old_string", ""), new_string):
+            spans.append((offset + start, offset + end))
+        offset += len(new_string) + 1  # Account for the " " separator
+    return spans
+
+
 def main():
     """Main hook function."""
     # Check if security reminders are enabled
@@ -223,22 +1018,40 @@ def main():
     if security_reminder_enabled == "0":
         sys.exit(0)
 
-    # Periodically clean up old state files (10% chance per run)
-    if random.random() < 0.1:
-        cleanup_old_state_files()
+    timings = {}
+    context = {}
+    start = time.perf_counter()
+    exit_code = 0
+    try:
+        run_hook(timings, context)
+    except SystemExit as e:
+        exit_code = e.code
+        raise
+    finally:
+        timings["total"] = round((time.perf_counter() - start) * 1000, 3)
+        debug_log(
+            "invocation", logging.INFO, exit_code=exit_code, timings_ms=timings, **context
+        )
 
+
+def run_hook(timings, context):
+    """Run the checks for one hook invocation, exiting with the hook result."""
     # Read input from stdin
-    try:
-        raw_input = sys.stdin.read()
-        input_data = json.loads(raw_input)
-    except json.JSONDecodeError as e:
-        debug_log(f"JSON decode error: {e}")
+    with timed(timings, "parse"):
+        try:
+            raw_input = sys.stdin.read()
+            input_data = json.loads(raw_input)
+        except json.JSONDecodeError as e:
+            debug_log(f"JSON decode error: {e}", logging.WARNING)
+            input_data = None
+    if input_data is None:
         sys.exit(0)  # Allow tool to proceed if we can't parse input
 
     # Extract session ID and tool information from the hook input
     session_id = input_data.get("session_id", "default")
     tool_name = input_data.get("tool_name", "")
     tool_input = input_data.get("tool_input", {})
+    context["tool_name"] = tool_name
 
     # Check if this is a relevant tool
     if tool_name not in ["Edit", "Write", "MultiEdit"]:
@@ -249,25 +1062,33 @@ def main():
     if not file_path:
         sys.exit(0)  # Allow if no file path
 
-    # Extract content to check
-    content = extract_content_from_input(tool_name, tool_input)
+    with timed(timings, "packs"):
+        packs = load_pattern_packs(input_data.get("cwd"))
+
+    with timed(timings, "scan"):
+        # Extract content to check
+        content = extract_content_from_input(tool_name, tool_input)
 
-    # Check for security patterns
-    rule_name, reminder = check_patterns(file_path, content)
+        # In diff mode, restrict edits to the text they actually introduce
+        spans = None
+        if os.environ.get(DIFF_MODE_ENV, "0") == "1":
+            spans = extract_inserted_spans(tool_name, tool_input)
+
+        # Check for security patterns
+        rule_name, reminder = check_patterns(
+            file_path, content, spans, packs, input_data.get("cwd")
+        )
+    context["content_chars"] = len(content)
+    context["rule_name"] = rule_name
 
     if rule_name and reminder:
         # Create unique warning key
         warning_key = f"{file_path}-{rule_name}"
 
-        # Load existing warnings for this session
-        shown_warnings = load_state(session_id)
-
-        # Check if we've already shown this warning in this session
-        if warning_key not in shown_warnings:
-            # Add to shown warnings and save
-            shown_warnings.add(warning_key)
-            save_state(session_id, shown_warnings)
-
+        # Record the warning and check if it was already shown this session
+        with timed(timings, "state"):
+            is_new_warning = mark_warning_shown(session_id, warning_key)
+        if is_new_warning:
             # Output the warning to stderr and block execution
             print(reminder, file=sys.stderr)
             sys.exit(2)  # Block tool execution (exit code 2 for PreToolUse hooks)
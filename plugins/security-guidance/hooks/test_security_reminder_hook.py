@@ -0,0 +1,331 @@
+"""Tests for security_reminder_hook.py (run with pytest)."""
+
+import json
+import logging
+import os
+import time
+
+import pytest
+
+import security_reminder_hook as hook
+
+
+def js_code_has(content, substring):
+    code = hook.mask_js_non_code(content)
+    return hook.content_has_substring(content, code, substring, None)
+
+
+def test_js_comments_are_masked():
+    content = "// eval(x)\nconst a = 1; /* eval(y)\n */ run()"
+    masked = hook.mask_js_non_code(content)
+    assert "eval(" not in masked
+    assert len(masked) == len(content)
+    assert masked.count("\n") == content.count("\n")
+
+
+def test_js_template_literal_text_is_masked_but_substitutions_are_code():
+    assert not js_code_has("const s = `call eval(x) later`", "eval(")
+    assert js_code_has("const s = `result: ${eval(x)}`", "eval(")
+    assert js_code_has("const s = `a ${`b ${c}`} eval(`; eval(y)", "eval(")
+
+
+def test_js_regex_literal_with_quote_does_not_hide_code():
+    assert js_code_has('const re = /"/; eval(x)', "eval(")
+    assert js_code_has("if (/['\"]/.test(s)) eval(s)", "eval(")
+    assert js_code_has('return /[/"]/g.exec(s) || eval(s)', "eval(")
+
+
+def test_js_regex_literal_body_is_masked():
+    assert not js_code_has("const re = /eval\\(/;", "eval(")
+
+
+def test_js_division_is_not_a_regex():
+    assert js_code_has('const half = total / 2; eval(x); const q = a / "b"', "eval(")
+    assert js_code_has("const r = (a) / 2 / eval(b)", "eval(")
+
+
+def test_js_ambiguous_slash_falls_back_to_raw_scan():
+    assert hook.mask_js_non_code('}\n/"/.test(s); eval(x)') is None
+    assert hook.mask_js_non_code("x = a++ / 2; y = 3 / 4") is None
+    assert hook.mask_non_code("app.js", "}\n/x/.test(s)") is None
+
+
+def test_python_comments_and_strings_are_masked():
+    content = "# eval(x)\ns = 'eval(y)'\nresult = eval(z)\n"
+    masked = hook.mask_python_non_code(content)
+    assert masked.count("eval(") == 1
+    assert hook.mask_python_non_code('s = """unterminated\n') is None
+
+
+def write_legacy_state(home, session_id, data, age=0):
+    path = home / ".claude" / f"security_warnings_state_{session_id}.json"
+    path.parent.mkdir(exist_ok=True)
+    path.write_text(json.dumps(data))
+    if age:
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_mark_warning_shown_once_per_session(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    assert hook.mark_warning_shown("s1", "a.py-eval_injection")
+    assert not hook.mark_warning_shown("s1", "a.py-eval_injection")
+    assert hook.mark_warning_shown("s2", "a.py-eval_injection")
+
+
+def test_legacy_state_files_are_swept_once(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    files = [
+        write_legacy_state(tmp_path, "recent", ["a.py-eval_injection"]),
+        write_legacy_state(tmp_path, "expired", ["b.py-eval_injection"], hook.STATE_TTL_SECONDS + 60),
+        write_legacy_state(tmp_path, "object", {}),
+        write_legacy_state(tmp_path, "number", 5),
+    ]
+    assert hook.mark_warning_shown("other", "c.py-eval_injection")
+    assert not any(path.exists() for path in files)
+    assert not hook.mark_warning_shown("recent", "a.py-eval_injection")
+    assert hook.mark_warning_shown("expired", "b.py-eval_injection")
+
+    # Once recorded, the sweep no longer takes the write lock
+    conn = hook.open_state_db()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    hook.sweep_legacy_state_files(conn)
+    conn.close()
+    assert not any(statement.startswith("BEGIN") for statement in statements)
+
+
+def test_legacy_state_file_that_is_not_a_list_is_discarded(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    assert hook.mark_warning_shown("s1", "first")  # Complete the one-time sweep
+    for data in ({}, 5, "text"):
+        path = write_legacy_state(tmp_path, "s1", data)
+        assert hook.mark_warning_shown("s1", f"key-{data}")
+        assert not path.exists()
+
+    write_legacy_state(tmp_path, "s1", ["legacy-key"])
+    assert not hook.mark_warning_shown("s1", "legacy-key")
+
+
+def test_inserted_spans_skip_unchanged_and_moved_lines():
+    old = "def f():\n    return eval(x)\n"
+    assert hook.inserted_spans(old, old) == []
+    assert hook.inserted_spans(old, "def f():\n") == []  # Pure deletion
+    assert hook.inserted_spans(old, "def f():\n        return eval(x)\n") == []
+
+    new = "def f():\n    y = 1\n    z = 2\n    return eval(x)\n"
+    (span,) = hook.inserted_spans(old, new)
+    assert new[span[0]:span[1]].strip() == "y = 1\n    z = 2"
+
+
+def test_inserted_spans_cover_matches_across_the_edit_boundary():
+    old = "x = ev()\n"
+    new = "x = eval()\n"
+    spans = hook.inserted_spans(old, new)
+    assert spans
+    assert hook.content_has_substring(new, None, "eval(", spans)
+
+
+def test_multiedit_spans_index_into_the_joined_content():
+    tool_input = {
+        "edits": [
+            {"old_string": "a = 1", "new_string": "a = 2"},
+            {"old_string": "b = eval(y)", "new_string": "b = eval(y)\nc = eval(z)"},
+        ]
+    }
+    content = hook.extract_content_from_input("MultiEdit", tool_input)
+    spans = hook.extract_inserted_spans("MultiEdit", tool_input)
+    assert [content[start:end] for start, end in spans] == ["2", "c = eval(z)"]
+    assert hook.extract_inserted_spans("Write", {"content": "eval(x)"}) is None
+
+
+def test_diff_mode_only_flags_introduced_text(tmp_path):
+    old = "result = eval(expr)\n"
+    unchanged = old + "print(result)\n"
+    introduced = old + "other = eval(more)\n"
+    path = str(tmp_path / "app.py")
+    spans = hook.inserted_spans(old, unchanged)
+    assert hook.check_patterns(path, unchanged, spans) == (None, None)
+    spans = hook.inserted_spans(old, introduced)
+    assert hook.check_patterns(path, introduced, spans)[0] == "eval_injection"
+
+
+@pytest.fixture
+def fresh_logger(monkeypatch):
+    """Let get_logger() configure the hook logger again, and undo it after."""
+    logger = logging.getLogger("security_reminder_hook")
+    monkeypatch.setattr(hook, "_logger", None)
+    yield
+    for handler in logger.handlers[:]:
+        handler.close()
+        logger.removeHandler(handler)
+    logger.disabled = False
+
+
+def flush_logs():
+    for handler in hook.get_logger().handlers:
+        handler.flush()
+
+
+def read_log_lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_logging_is_off_by_default(tmp_path, monkeypatch, fresh_logger):
+    log_file = tmp_path / "hook.log"
+    monkeypatch.delenv(hook.LOG_LEVEL_ENV, raising=False)
+    monkeypatch.setenv(hook.LOG_FILE_ENV, str(log_file))
+    hook.debug_log("ignored", logging.ERROR)
+    assert hook.get_logger().disabled
+    assert not log_file.exists()
+
+
+def test_log_records_are_buffered_json_lines(tmp_path, monkeypatch, fresh_logger):
+    log_file = tmp_path / "hook.log"
+    monkeypatch.setenv(hook.LOG_LEVEL_ENV, "info")
+    monkeypatch.setenv(hook.LOG_FILE_ENV, str(log_file))
+    hook.debug_log("skipped", logging.DEBUG)
+    hook.debug_log("invocation", logging.INFO, tool_name="Edit", timings_ms={"scan": 1.5})
+    assert not log_file.exists()  # Held in memory until flushed
+
+    flush_logs()
+    (entry,) = read_log_lines(log_file)
+    assert entry["message"] == "invocation"
+    assert entry["level"] == "info"
+    assert entry["tool_name"] == "Edit"
+    assert entry["timings_ms"] == {"scan": 1.5}
+
+    hook.debug_log("failed", logging.ERROR)  # Errors flush immediately
+    assert [entry["message"] for entry in read_log_lines(log_file)] == ["invocation", "failed"]
+
+
+def test_log_file_is_rotated(tmp_path, monkeypatch, fresh_logger):
+    log_file = tmp_path / "hook.log"
+    monkeypatch.setattr(hook, "LOG_MAX_BYTES", 512)
+    monkeypatch.setenv(hook.LOG_LEVEL_ENV, "debug")
+    monkeypatch.setenv(hook.LOG_FILE_ENV, str(log_file))
+    for i in range(200):
+        hook.debug_log(f"message {i}", index=i)
+    flush_logs()
+
+    files = sorted(path.name for path in tmp_path.iterdir())
+    assert files == ["hook.log", "hook.log.1", "hook.log.2", "hook.log.3"]
+    for path in tmp_path.iterdir():
+        assert path.stat().st_size <= 512
+    assert read_log_lines(log_file)[-1]["index"] == 199
+
+
+@pytest.fixture
+def pack_dirs(tmp_path, monkeypatch):
+    """Isolated (user, project) pack directories; returns them and the project."""
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.setenv("CLAUDE_PLUGIN_ROOT", str(tmp_path / "plugin"))
+    monkeypatch.delenv("CLAUDE_PROJECT_DIR", raising=False)
+    project = tmp_path / "project"
+    user_dir = tmp_path / "home" / ".claude" / hook.PATTERN_PACK_DIRNAME
+    project_dir = project / ".claude" / hook.PATTERN_PACK_DIRNAME
+    user_dir.mkdir(parents=True)
+    project_dir.mkdir(parents=True)
+    return user_dir, project_dir, project
+
+
+def write_pack(directory, name, patterns):
+    path = directory / name
+    path.write_text(json.dumps({"patterns": patterns}))
+    return path
+
+
+INFRA_RULE = {
+    "ruleName": "infra_change",
+    "path_globs": ["infra/*.tf"],
+    "reminder": "Infrastructure change",
+}
+
+
+def test_no_pattern_packs(pack_dirs):
+    _, _, project = pack_dirs
+    assert hook.load_pattern_packs(str(project)) is None
+
+
+def test_pack_path_globs_match_project_relative_paths(pack_dirs):
+    _, project_dir, project = pack_dirs
+    write_pack(project_dir, "infra.json", [INFRA_RULE])
+    packs = hook.load_pattern_packs(str(project))
+
+    def rule_for(path):
+        return hook.check_patterns(str(project / path), "", packs=packs, project_dir=str(project))[0]
+
+    assert rule_for("infra/main.tf") == "infra_change"
+    assert rule_for("modules/infra/main.tf") is None
+    assert rule_for("infra/nested/main.tf") is None
+
+
+def test_later_packs_override_rules_by_name(pack_dirs):
+    user_dir, project_dir, project = pack_dirs
+    write_pack(user_dir, "a.json", [
+        {"ruleName": "token", "substrings": ["TOKEN"], "reminder": "user"},
+        {"ruleName": "secret", "substrings": ["SECRET"], "reminder": "user secret"},
+    ])
+    write_pack(project_dir, "a.json", [
+        {"ruleName": "token", "substrings": ["API_TOKEN"], "reminder": "project"},
+    ])
+    packs = hook.load_pattern_packs(str(project))
+    assert hook.check_patterns("a.txt", "API_TOKEN=1", packs=packs) == ("token", "project")
+    assert hook.check_patterns("a.txt", "TOKEN=1", packs=packs) == (None, None)
+    assert hook.check_patterns("a.txt", "SECRET=1", packs=packs) == ("secret", "user secret")
+
+
+def test_invalid_pack_rules_are_skipped(pack_dirs):
+    _, project_dir, project = pack_dirs
+    write_pack(project_dir, "a.json", [
+        {"ruleName": "no_reminder", "substrings": ["A"]},
+        {"ruleName": "no_match", "reminder": "r"},
+        {"ruleName": "bad_type", "substrings": "B", "reminder": "r"},
+        "not a rule",
+        {"ruleName": "valid", "substrings": ["C"], "reminder": "r"},
+    ])
+    (project_dir / "broken.json").write_text("{not json")
+    packs = hook.load_pattern_packs(str(project))
+    assert [rule["ruleName"] for rule in packs["rules"]] == ["valid"]
+
+
+@pytest.mark.skipif(hook.tomllib is None, reason="TOML packs need Python 3.11+")
+def test_toml_pattern_pack(pack_dirs):
+    _, project_dir, project = pack_dirs
+    (project_dir / "infra.toml").write_text(
+        '[[patterns]]\nruleName = "infra_change"\n'
+        'path_globs = ["*.tf"]\nreminder = "Infrastructure change"\n'
+    )
+    packs = hook.load_pattern_packs(str(project))
+    path = str(project / "modules" / "main.tf")
+    assert hook.check_patterns(path, "", packs=packs, project_dir=str(project))[0] == "infra_change"
+
+
+def test_compiled_packs_are_cached_until_a_pack_changes(pack_dirs, monkeypatch):
+    user_dir, project_dir, project = pack_dirs
+    write_pack(project_dir, "infra.json", [INFRA_RULE])
+    first = hook.load_pattern_packs(str(project))
+    (cache_file,) = user_dir.parent.glob("security_patterns_cache_*.bin")
+
+    compile_calls = []
+    compile_pattern_packs = hook.compile_pattern_packs
+
+    def counting_compile(pack_files):
+        compile_calls.append(pack_files)
+        return compile_pattern_packs(pack_files)
+
+    monkeypatch.setattr(hook, "compile_pattern_packs", counting_compile)
+    cached = hook.load_pattern_packs(str(project))
+    assert not compile_calls
+    assert cached["rules"] == first["rules"]
+    assert cached["path_matcher"].pattern == first["path_matcher"].pattern
+
+    write_pack(project_dir, "infra.json", [dict(INFRA_RULE, reminder="Changed reminder")])
+    rebuilt = hook.load_pattern_packs(str(project))
+    assert len(compile_calls) == 1
+    assert rebuilt["rules"][0]["reminder"] == "Changed reminder"
+
+    cache_file.write_bytes(b"garbage")
+    assert hook.load_pattern_packs(str(project))["rules"] == rebuilt["rules"]
+    assert len(compile_calls) == 2